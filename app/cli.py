@@ -0,0 +1,352 @@
+"""
+Operational commands that must not run on every worker boot.
+
+Usage:
+    python -m app.cli init-db
+    python -m app.cli upgrade-db
+    python -m app.cli bench-startup [--budget-ms 3000]
+    python -m app.cli bench-password [--concurrency 50] [--requests 200]
+    python -m app.cli bench-requests [--concurrency 200] [--requests 2000]
+    python -m app.cli smtp-sink [--host 127.0.0.1] [--port 1025]
+    python -m app.cli backfill-profile-completeness [--batch-size 1000]
+    python -m app.cli build-search-index
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+import logging
+
+from app.config import settings
+from app.db import Base, create_sync_engine
+
+logger = logging.getLogger(__name__)
+
+
+# Runs in a fresh interpreter so module import cost is measured cold
+STARTUP_PROBE = """
+import asyncio, json, time
+start = time.perf_counter()
+from app.main import create_app
+app = create_app()
+imported = time.perf_counter()
+
+async def first_request():
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": "/health", "raw_path": b"/health",
+        "root_path": "", "query_string": b"", "headers": [(b"host", b"localhost")],
+        "client": ("127.0.0.1", 0), "server": ("localhost", 80),
+    }
+    status = {}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status["code"] = message["status"]
+
+    await app(scope, receive, send)
+    return status.get("code")
+
+code = asyncio.run(first_request())
+done = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "first_request_ms": (done - imported) * 1000,
+    "total_ms": (done - start) * 1000,
+    "status": code,
+}))
+"""
+
+
+def init_db():
+    """Create any missing tables."""
+    from app.models import cache_version, models, post, revoked_token, search, social_account  # noqa: F401  register tables on Base.metadata
+
+    engine = create_sync_engine()
+    Base.metadata.create_all(bind=engine)
+    logger.info("Database tables created")
+    upgrade_db(engine)
+
+
+def upgrade_db(engine=None):
+    """Add the columns and indexes of app/models/upgrades.py that an existing database lacks."""
+    from sqlalchemy import inspect, text
+    from sqlalchemy.schema import CreateColumn
+    from app.models.upgrades import UPGRADE_COLUMNS, UPGRADE_INDEX_PREPARATION, UPGRADE_INDEXES
+
+    engine = engine or create_sync_engine()
+    postgres = engine.dialect.name == "postgresql"
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        for column in UPGRADE_COLUMNS:
+            table = column.table.name
+            if column.name in {existing["name"] for existing in inspector.get_columns(table)}:
+                continue
+            definition = str(CreateColumn(column).compile(dialect=engine.dialect))
+            if engine.dialect.name == "sqlite":
+                # SQLite can only add generated columns as VIRTUAL
+                definition = definition.replace(" STORED", " VIRTUAL")
+            if_not_exists = "IF NOT EXISTS " if postgres else ""
+            connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {if_not_exists}{definition}"))
+            logger.info(f"Added column {table}.{column.name}")
+        indexes = {index.name: index for table in Base.metadata.tables.values() for index in table.indexes}
+        for name in UPGRADE_INDEXES:
+            index = indexes[name]
+            if name in {existing["name"] for existing in inspector.get_indexes(index.table.name)}:
+                continue
+            for statement in UPGRADE_INDEX_PREPARATION.get(name, []):
+                result = connection.execute(text(statement))
+                logger.info(f"Prepared {name}: {result.rowcount} rows affected")
+            index.create(connection)
+            logger.info(f"Created index {name}")
+    logger.info("Database schema up to date")
+
+
+def backfill_profile_completeness(batch_size: int) -> int:
+    """Fill profile_tips_mask for doctors created before it was maintained."""
+    from sqlalchemy import bindparam, select, update
+    from sqlalchemy.orm import Session
+    from app.models import models  # noqa: F401  register tables on Base.metadata
+    from app.models.models import Doctor
+    from app.utils.profile import PROFILE_FIELDS, missing_fields_mask
+
+    engine = create_sync_engine()
+    # The columns may not exist yet on databases created before they were added
+    upgrade_db(engine)
+    columns = [getattr(Doctor, name) for name, _ in PROFILE_FIELDS]
+    # executemany keyed by doctor_id; "id" would clash with the column name
+    stmt = update(Doctor.__table__).where(Doctor.id == bindparam("doctor_id")).values(
+        profile_tips_mask=bindparam("mask")
+    )
+    total = 0
+    with Session(engine) as db:
+        while True:
+            rows = db.execute(
+                select(Doctor.id, *columns).where(Doctor.profile_tips_mask.is_(None)).limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            db.execute(stmt, [
+                {"doctor_id": row.id, "mask": missing_fields_mask(row._mapping)} for row in rows
+            ])
+            db.commit()
+            total += len(rows)
+            logger.info(f"Backfilled {total} doctors")
+    print(f"Backfilled profile completeness for {total} doctors")
+    return total
+
+
+def build_search_index():
+    """Create the doctor search indexes on an existing database (new databases get them from init-db)."""
+    from sqlalchemy import text
+    from app.models.search import POSTGRES_SEARCH_DDL, SQLITE_SEARCH_DDL
+
+    engine = create_sync_engine()
+    with engine.begin() as connection:
+        if engine.dialect.name == "postgresql":
+            statements = POSTGRES_SEARCH_DDL
+        elif engine.dialect.name == "sqlite":
+            # Index the rows that existed before the triggers
+            statements = SQLITE_SEARCH_DDL + ["INSERT INTO doctors_fts(doctors_fts) VALUES ('rebuild')"]
+        else:
+            raise NotImplementedError(f"Doctor search is not supported on {engine.dialect.name}")
+        for statement in statements:
+            connection.execute(text(statement))
+    logger.info("Doctor search indexes built")
+
+
+def bench_startup(budget_ms: int) -> int:
+    """Measure cold import + create_app + first request and compare it to the budget."""
+    result = subprocess.run(
+        [sys.executable, "-c", STARTUP_PROBE],
+        capture_output=True, text=True, check=False
+    )
+    if result.returncode != 0:
+        print(result.stderr, file=sys.stderr)
+        return result.returncode
+
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    print(
+        f"import+create_app {timings['import_ms']:.1f} ms, first request {timings['first_request_ms']:.1f} ms "
+        f"(status {timings['status']}), total {timings['total_ms']:.1f} ms, budget {budget_ms} ms"
+    )
+    if timings["status"] != 200 or timings["total_ms"] > budget_ms:
+        print("Startup budget exceeded", file=sys.stderr)
+        return 1
+    return 0
+
+
+async def _measure_logins(verify, total: int, concurrency: int) -> tuple[float, float]:
+    """Run total password checks with bounded concurrency; return (elapsed, max loop lag)."""
+    max_lag = 0.0
+    done = asyncio.Event()
+
+    async def watch_loop():
+        nonlocal max_lag
+        while not done.is_set():
+            tick = time.perf_counter()
+            await asyncio.sleep(0.005)
+            max_lag = max(max_lag, time.perf_counter() - tick - 0.005)
+
+    slots = asyncio.Semaphore(concurrency)
+
+    async def login():
+        async with slots:
+            await verify()
+
+    watcher = asyncio.create_task(watch_loop())
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(total)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await watcher
+    return elapsed, max_lag
+
+
+async def _bench_password(total: int, concurrency: int):
+    from app.utils.password import get_password_context, hash_password, verify_and_update_password
+
+    password = "benchmark-password"
+    stored = await hash_password(password)
+
+    async def inline():
+        get_password_context().verify(password, stored)
+
+    async def pooled():
+        await verify_and_update_password(password, stored)
+
+    print(f"bcrypt cost {settings.BCRYPT_ROUNDS}, {settings.PASSWORD_HASH_WORKERS} workers, "
+          f"{total} logins at concurrency {concurrency}")
+    for label, verify in (("on event loop", inline), ("worker pool", pooled)):
+        elapsed, max_lag = await _measure_logins(verify, total, concurrency)
+        print(f"  {label:>13}: {total / elapsed:7.1f} logins/s, max event-loop stall {max_lag * 1000:7.1f} ms")
+
+
+async def _measure_requests(handle, total: int, concurrency: int) -> tuple[float, list[float]]:
+    """Run total requests from concurrency clients; return (elapsed, sorted per-request latencies)."""
+    latencies = []
+    slots = asyncio.Semaphore(concurrency)
+
+    async def client():
+        async with slots:
+            start = time.perf_counter()
+            await handle()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(total)))
+    return time.perf_counter() - start, sorted(latencies)
+
+
+async def _bench_requests(total: int, concurrency: int):
+    """Serve the same directory-page query through a sync session in the threadpool and through AsyncSession."""
+    from sqlalchemy import select
+    from sqlalchemy.orm import Session
+    from starlette.concurrency import run_in_threadpool
+    from app.db import AsyncSessionLocal, configure_database, dispose_database
+    from app.models.models import Doctor
+
+    query = select(Doctor.id, Doctor.full_name, Doctor.speciality_id).order_by(Doctor.id).limit(20)
+    sync_engine = create_sync_engine()
+    configure_database()
+
+    def sync_query():
+        with Session(sync_engine) as db:
+            db.execute(query).all()
+
+    async def threadpool():
+        # What FastAPI does for a def endpoint depending on a sync session
+        await run_in_threadpool(sync_query)
+
+    async def native():
+        async with AsyncSessionLocal() as db:
+            (await db.execute(query)).all()
+
+    print(f"{sync_engine.dialect.name}, {total} requests from {concurrency} concurrent clients, "
+          f"pool size {settings.DB_POOL_SIZE} + {settings.DB_MAX_OVERFLOW} overflow")
+    try:
+        for label, handle in (("sync session", threadpool), ("async session", native)):
+            await handle()  # warm the pool
+            elapsed, latencies = await _measure_requests(handle, total, concurrency)
+            p50 = latencies[len(latencies) // 2]
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            print(f"  {label:>13}: {total / elapsed:8.1f} req/s, p50 {p50 * 1000:7.1f} ms, p99 {p99 * 1000:7.1f} ms")
+    finally:
+        sync_engine.dispose()
+        await dispose_database()
+
+
+async def _smtp_sink(host: str, port: int):
+    from app.utils.smtp_sink import SMTPSink
+
+    sink = SMTPSink(host, port, echo=True)
+    print(f"SMTP sink on {host}:{port}; run the API with SMTP_HOST={host} SMTP_PORT={port} SMTP_USE_TLS=false")
+    await sink.serve_forever()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("init-db", help="Create missing database tables")
+    commands.add_parser("upgrade-db", help="Add new columns and indexes to an existing database")
+
+    bench = commands.add_parser("bench-startup", help="Check cold start time against a budget")
+    bench.add_argument("--budget-ms", type=int, default=None)
+
+    password = commands.add_parser("bench-password", help="Compare login password checks inline vs in the worker pool")
+    password.add_argument("--concurrency", type=int, default=50)
+    password.add_argument("--requests", type=int, default=200)
+
+    requests = commands.add_parser("bench-requests", help="Compare request throughput on sync vs async database sessions")
+    requests.add_argument("--concurrency", type=int, default=200)
+    requests.add_argument("--requests", type=int, default=2000)
+
+    backfill = commands.add_parser("backfill-profile-completeness", help="Compute stored profile completeness for existing doctors")
+    backfill.add_argument("--batch-size", type=int, default=1000)
+
+    commands.add_parser("build-search-index", help="Create doctor search indexes on an existing database")
+
+    sink = commands.add_parser("smtp-sink", help="Run a local SMTP server that prints every message it receives")
+    sink.add_argument("--host", default="127.0.0.1")
+    sink.add_argument("--port", type=int, default=1025)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    if args.command == "init-db":
+        init_db()
+        return 0
+    if args.command == "upgrade-db":
+        upgrade_db()
+        return 0
+    if args.command == "bench-startup":
+        return bench_startup(args.budget_ms or settings.STARTUP_BUDGET_MS)
+    if args.command == "bench-password":
+        asyncio.run(_bench_password(args.requests, args.concurrency))
+        return 0
+    if args.command == "bench-requests":
+        asyncio.run(_bench_requests(args.requests, args.concurrency))
+        return 0
+    if args.command == "backfill-profile-completeness":
+        backfill_profile_completeness(args.batch_size)
+        return 0
+    if args.command == "build-search-index":
+        build_search_index()
+        return 0
+    if args.command == "smtp-sink":
+        try:
+            asyncio.run(_smtp_sink(args.host, args.port))
+        except KeyboardInterrupt:
+            pass
+        return 0
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
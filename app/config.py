@@ -1,27 +1,137 @@
 import os
+from functools import lru_cache
+from pathlib import Path
 from typing import Optional
+from dotenv import load_dotenv
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
 
 class Settings:
-    # Database settings
-    DATABASE_URL: Optional[str] = os.environ.get("DATABASE_URL")
-    STATIC_API_KEY: Optional[str] = os.environ.get("STATIC_API_KEY")
-    SECRET_KEY: Optional[str] = os.environ.get("SECRET_KEY")
-
-    # JWT settings
-    SECRET_KEY: str = os.environ.get("SESSION_SECRET")
-    if not SECRET_KEY:
-        raise ValueError("SESSION_SECRET environment variable is required for secure JWT operations")
-    ALGORITHM: str = "HS256"
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
-    
-    # OTP settings
-    OTP_EXPIRE_MINUTES: int = 5
-    OTP_LENGTH: int = 6
-    
-    # Application settings
-    PROJECT_NAME: str = "Medical API"
-    VERSION: str = "1.0.0"
-    DEBUG: bool = os.environ.get("DEBUG", "false").lower() == "true"
-
-settings = Settings()
+    """Application settings, read from the environment when first needed."""
+
+    def __init__(self):
+        # Database settings
+        self.DATABASE_URL: Optional[str] = os.environ.get("DATABASE_URL")
+        self.STATIC_API_KEY: Optional[str] = os.environ.get("STATIC_API_KEY")
+        # Signing key for the Google sign-in tokens issued by app.auth
+        self.AUTH_SECRET_KEY: Optional[str] = os.environ.get("SECRET_KEY")
+
+        # Connection pool settings
+        self.DATABASE_REPLICA_URL: Optional[str] = os.environ.get("DATABASE_REPLICA_URL")
+        self.DB_POOL_SIZE: int = int(os.environ.get("DB_POOL_SIZE", "5"))
+        self.DB_MAX_OVERFLOW: int = int(os.environ.get("DB_MAX_OVERFLOW", "10"))
+        self.DB_POOL_TIMEOUT: int = int(os.environ.get("DB_POOL_TIMEOUT", "30"))
+        self.DB_POOL_RECYCLE: int = int(os.environ.get("DB_POOL_RECYCLE", "300"))
+        self.DB_POOL_PRE_PING: bool = os.environ.get("DB_POOL_PRE_PING", "false").lower() == "true"
+        self.DB_STATEMENT_TIMEOUT_MS: int = int(os.environ.get("DB_STATEMENT_TIMEOUT_MS", "0"))
+
+        # JWT settings
+        self._session_secret: Optional[str] = os.environ.get("SESSION_SECRET")
+        self.ALGORITHM: str = "HS256"
+        self.ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+
+        # Refresh token revocation settings
+        self.REVOCATION_SYNC_SECONDS: int = int(os.environ.get("REVOCATION_SYNC_SECONDS", "30"))
+        self.REVOCATION_PURGE_MINUTES: int = int(os.environ.get("REVOCATION_PURGE_MINUTES", "60"))
+
+        # Authenticated-principal cache settings
+        self.PRINCIPAL_CACHE_SIZE: int = int(os.environ.get("PRINCIPAL_CACHE_SIZE", "10000"))
+        self.PRINCIPAL_CACHE_TTL_SECONDS: int = int(os.environ.get("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+
+        # Verified-JWT claims cache settings
+        self.JWT_CLAIMS_CACHE_SIZE: int = int(os.environ.get("JWT_CLAIMS_CACHE_SIZE", "10000"))
+        self.JWT_CLAIMS_CACHE_TTL_SECONDS: int = int(os.environ.get("JWT_CLAIMS_CACHE_TTL_SECONDS", "300"))
+
+        # Master data cache settings
+        self.MASTER_CACHE_TTL_SECONDS: int = int(os.environ.get("MASTER_CACHE_TTL_SECONDS", "300"))
+        self.MASTER_CACHE_POLL_SECONDS: int = int(os.environ.get("MASTER_CACHE_POLL_SECONDS", "10"))
+
+        # Password hashing settings
+        self.BCRYPT_ROUNDS: int = int(os.environ.get("BCRYPT_ROUNDS", "12"))
+        self.PASSWORD_HASH_WORKERS: int = int(os.environ.get("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+        self.PASSWORD_HASH_MAX_PENDING: int = int(os.environ.get("PASSWORD_HASH_MAX_PENDING", "64"))
+        self.PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS: float = float(os.environ.get("PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS", "2"))
+
+        # OTP settings
+        self.OTP_EXPIRE_MINUTES: int = 5
+        self.OTP_LENGTH: int = 6
+        self.OTP_BACKEND: str = os.environ.get("OTP_BACKEND", "database")  # database, memory
+        self.OTP_SWEEP_INTERVAL_MINUTES: int = int(os.environ.get("OTP_SWEEP_INTERVAL_MINUTES", "10"))
+
+        # Media storage settings
+        self.MEDIA_ROOT: str = os.environ.get("MEDIA_ROOT", str(BASE_DIR / "media"))
+        self.MEDIA_URL_PREFIX: str = os.environ.get("MEDIA_URL_PREFIX", "/media")
+        self.MEDIA_WORKERS: int = int(os.environ.get("MEDIA_WORKERS", "2"))
+        self.PHOTO_MAX_BYTES: int = int(os.environ.get("PHOTO_MAX_BYTES", str(10 * 1024 * 1024)))
+        self.PHOTO_MAX_PIXELS: int = int(os.environ.get("PHOTO_MAX_PIXELS", str(40_000_000)))  # Decoded width x height
+        self.PHOTO_THUMBNAIL_SIZES: list[int] = [
+            int(size) for size in os.environ.get("PHOTO_THUMBNAIL_SIZES", "64,128,256").split(",")
+        ]
+
+        # Bulk import settings
+        self.IMPORT_CHUNK_SIZE: int = int(os.environ.get("IMPORT_CHUNK_SIZE", "1000"))
+        self.IMPORT_MAX_ERRORS: int = int(os.environ.get("IMPORT_MAX_ERRORS", "1000"))
+
+        # Export settings
+        self.EXPORT_BATCH_SIZE: int = int(os.environ.get("EXPORT_BATCH_SIZE", "1000"))
+        self.EXPORT_GZIP_LEVEL: int = int(os.environ.get("EXPORT_GZIP_LEVEL", "6"))
+
+        # Email delivery settings
+        self.SMTP_HOST: Optional[str] = os.environ.get("SMTP_HOST")
+        self.SMTP_PORT: int = int(os.environ.get("SMTP_PORT", "587"))
+        self.SMTP_USERNAME: Optional[str] = os.environ.get("SMTP_USERNAME")
+        self.SMTP_PASSWORD: Optional[str] = os.environ.get("SMTP_PASSWORD")
+        self.SMTP_USE_TLS: bool = os.environ.get("SMTP_USE_TLS", "true").lower() == "true"
+        self.SMTP_TIMEOUT_SECONDS: float = float(os.environ.get("SMTP_TIMEOUT_SECONDS", "10"))
+        self.EMAIL_FROM: str = os.environ.get("EMAIL_FROM", "no-reply@mediconnect.local")
+        self.EMAIL_QUEUE_SIZE: int = int(os.environ.get("EMAIL_QUEUE_SIZE", "10000"))
+        self.EMAIL_BATCH_SIZE: int = int(os.environ.get("EMAIL_BATCH_SIZE", "50"))
+        self.EMAIL_BATCH_INTERVAL_SECONDS: float = float(os.environ.get("EMAIL_BATCH_INTERVAL_SECONDS", "0.5"))
+        self.EMAIL_WORKERS: int = int(os.environ.get("EMAIL_WORKERS", "2"))
+
+        # Rate limiting settings
+        self.RATE_LIMIT_ENABLED: bool = os.environ.get("RATE_LIMIT_ENABLED", "true").lower() == "true"
+        self.RATE_LIMIT_WINDOW_SECONDS: int = int(os.environ.get("RATE_LIMIT_WINDOW_SECONDS", "60"))
+        self.RATE_LIMIT_PER_EMAIL: int = int(os.environ.get("RATE_LIMIT_PER_EMAIL", "5"))
+        self.RATE_LIMIT_PER_IP: int = int(os.environ.get("RATE_LIMIT_PER_IP", "30"))
+        self.RATE_LIMIT_MAX_KEYS: int = int(os.environ.get("RATE_LIMIT_MAX_KEYS", "100000"))
+        self.RATE_LIMIT_REDIS_URL: Optional[str] = os.environ.get("RATE_LIMIT_REDIS_URL")
+        self.RATE_LIMIT_TRUST_FORWARDED: bool = os.environ.get("RATE_LIMIT_TRUST_FORWARDED", "false").lower() == "true"
+
+        # Scheduler settings
+        self.SCHEDULER_SLOT_SECONDS: int = int(os.environ.get("SCHEDULER_SLOT_SECONDS", "60"))
+        self.SCHEDULER_MAX_TOLERANCE_MINUTES: int = int(os.environ.get("SCHEDULER_MAX_TOLERANCE_MINUTES", "30"))
+
+        # Application settings
+        self.PROJECT_NAME: str = "Medical API"
+        self.VERSION: str = "1.0.0"
+        self.DEBUG: bool = os.environ.get("DEBUG", "false").lower() == "true"
+        self.STARTUP_BUDGET_MS: int = int(os.environ.get("STARTUP_BUDGET_MS", "3000"))
+
+        # SQL instrumentation settings
+        self.SQL_METRICS_SAMPLE_RATE: float = float(os.environ.get("SQL_METRICS_SAMPLE_RATE", "0.1"))
+        self.SQL_METRICS_REPEAT_THRESHOLD: int = int(os.environ.get("SQL_METRICS_REPEAT_THRESHOLD", "5"))
+
+    @property
+    def SECRET_KEY(self) -> str:
+        if not self._session_secret:
+            raise ValueError("SESSION_SECRET environment variable is required for secure JWT operations")
+        return self._session_secret
+
+
+@lru_cache
+def get_settings() -> Settings:
+    """Load .env and build the settings on first use."""
+    load_dotenv(BASE_DIR / ".env")
+    return Settings()
+
+
+class _LazySettings:
+    """Module-level handle that defers to get_settings() on attribute access."""
+
+    def __getattr__(self, name: str):
+        return getattr(get_settings(), name)
+
 
+settings = _LazySettings()
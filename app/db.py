@@ -1,35 +1,157 @@
-from dotenv import load_dotenv
-import os
-from pathlib import Path
+from typing import Optional
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import QueuePool
+from app.config import settings
 
 
-BASE_DIR = Path(__file__).resolve().parent.parent
-load_dotenv(BASE_DIR / ".env")
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
 
-DATABASE_URL = os.getenv("DATABASE_URL")
 
-# print("DEBUG - Loaded DATABASE_URL:", DATABASE_URL)
+def get_async_url(url: str):
+    """Translate a sync DATABASE_URL into the equivalent asyncio driver URL."""
+    async_url = make_url(url.replace("postgres://", "postgresql://", 1))
+    backend = async_url.get_backend_name()
+    if backend in ASYNC_DRIVERS:
+        async_url = async_url.set(drivername=ASYNC_DRIVERS[backend])
+
+    # asyncpg spells libpq's sslmode as ssl
+    if backend == "postgresql" and "sslmode" in async_url.query:
+        sslmode = async_url.query["sslmode"]
+        async_url = async_url.difference_update_query(["sslmode"]).update_query_dict({"ssl": sslmode})
+    return async_url
+
+
+def get_engine_options(url) -> dict:
+    """Build pool and timeout options for an engine from Settings."""
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite":
+        # SQLite uses its own single-file pools; sizing and timeouts do not apply
+        return {}
+
+    options = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        timeout = str(settings.DB_STATEMENT_TIMEOUT_MS)
+        if url.get_driver_name() == "asyncpg":
+            options["connect_args"] = {"server_settings": {"statement_timeout": timeout}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+    return options
 
-if not DATABASE_URL:
-    raise ValueError("DATABASE_URL environment variable is required")
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True, pool_recycle=300)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+# Session factories are bound to their engines by configure_database(), which
+# create_app() and the CLI call; nothing connects at import time.
+AsyncSessionLocal = async_sessionmaker(class_=AsyncSession, autoflush=False, expire_on_commit=False)
+AsyncReadSessionLocal = async_sessionmaker(class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+async_engine = None
+replica_engine = None
+
+
+def _database_url(database_url: Optional[str]) -> str:
+    database_url = database_url or settings.DATABASE_URL
+    if not database_url:
+        raise ValueError("DATABASE_URL environment variable is required")
+    return database_url
+
+
+def create_sync_engine(database_url: Optional[str] = None):
+    """Blocking engine for CLI commands (DDL, backfills); web workers only use the async engines."""
+    database_url = _database_url(database_url)
+    return create_engine(database_url, **get_engine_options(database_url))
+
+
+def configure_database(database_url: Optional[str] = None):
+    """Create the async engines from Settings and bind the session factories to them."""
+    global async_engine, replica_engine
+
+    database_url = _database_url(database_url)
+    async_url = get_async_url(database_url)
+    async_engine = create_async_engine(async_url, **get_engine_options(async_url))
+    AsyncSessionLocal.configure(bind=async_engine)
+
+    # Optional read replica for read-only endpoints; falls back to the primary
+    if settings.DATABASE_REPLICA_URL:
+        replica_url = get_async_url(settings.DATABASE_REPLICA_URL)
+        replica_engine = create_async_engine(replica_url, **get_engine_options(replica_url))
+        AsyncReadSessionLocal.configure(bind=replica_engine)
+    else:
+        replica_engine = None
+        AsyncReadSessionLocal.configure(bind=async_engine)
+    return async_engine
+
+
+async def dispose_database():
+    """Close pooled connections on shutdown."""
+    for async_eng in (async_engine, replica_engine):
+        if async_eng is not None:
+            await async_eng.dispose()
+
+
+def dialect_insert(db: AsyncSession, model):
+    """INSERT construct with ON CONFLICT support for the session's database."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Upserts are not supported on {dialect}")
+    return insert(model)
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+async def get_async_read_db():
+    """Session for read-only endpoints, routed to the replica when one is configured."""
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
+
+def get_engines() -> dict:
+    """The sync engines behind the request-serving async engines, keyed by role."""
+    engines = {"primary": async_engine.sync_engine}
+    if replica_engine is not None:
+        engines["replica"] = replica_engine.sync_engine
+    return engines
+
+
+def get_pool_stats() -> dict:
+    """Report connection pool utilisation for each engine."""
+    stats = {}
+    for name, sync_engine in get_engines().items():
+        pool = sync_engine.pool
+        if isinstance(pool, QueuePool):
+            stats[name] = {
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+            }
+        else:
+            stats[name] = {"status": pool.status()}
+    return stats
 
 
 # import os
 # from sqlalchemy import create_engine
-# from sqlalchemy.orm import sessionmaker, declarative_base
+# from sqlalchemy.orm import declarative_base
 # from dotenv import load_dotenv
 
 # load_dotenv()
@@ -52,53 +52,49 @@
 #     }
 
 
-from fastapi import FastAPI
-from app.routers import auth, doctor, master, social, posts
+from fastapi import APIRouter, FastAPI
+from app.routers import admin, auth, directory, doctor, master, media, social, posts
 from app.config import settings
 from app.utils.scheduler import start_scheduler, stop_scheduler
-from app.db import Base, engine
+from app.db import configure_database, dispose_database, get_engines, get_pool_stats
+from app.utils.email_queue import get_email_queue, start_email_queue, stop_email_queue
+from app.utils.jwt import get_claims_cache
+from app.utils.principal import get_principal_cache
+from app.utils.revocation import get_revocation_filter
+from app.utils.sql_metrics import SQLMetricsMiddleware, instrument_engine
 import logging
-from app.models import models as doctor_model
-from app.models import post as post_model
-from app.models import social_account as social_model
 from app.routers import UserLogin as userlogin
 
 
+logger = logging.getLogger(__name__)
 
+router = APIRouter()
 
-print("Creating tables if they don't exist...")
-Base.metadata.create_all(bind=engine)
-
-logger = logging.getLogger(__name__)
 
-app = FastAPI(
-    title=settings.PROJECT_NAME,
-    description="FastAPI with PostgreSQL integration for Medical Practice Management",
-    version=settings.VERSION
-)
-
-app.include_router(userlogin.router)
-app.include_router(auth.router)
-app.include_router(doctor.router)
-app.include_router(master.router)
-app.include_router(social.router)
-app.include_router(posts.router)
-
-@app.on_event("startup")
-async def startup_event():
-    """Initialize services on app startup"""
-    start_scheduler()
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Cleanup on app shutdown"""
-    stop_scheduler()
-
-@app.get("/health")
+@router.get("/health")
 async def health():
     return {"status": "ok", "message": "Medical API is running"}
 
-@app.get("/")
+@router.get("/health/db")
+async def health_db():
+    """Connection pool utilisation for the primary and replica engines"""
+    return {"pools": get_pool_stats()}
+
+@router.get("/health/cache")
+async def health_cache():
+    """Size and hit/miss counters for the in-process caches"""
+    return {
+        "jwt_claims": get_claims_cache().stats(),
+        "principals": get_principal_cache().stats(),
+        "revoked_refresh_tokens": get_revocation_filter().stats(),
+    }
+
+@router.get("/health/email")
+async def health_email():
+    """Email queue depth, delivery counters and enqueue-to-delivery latency"""
+    return get_email_queue().stats()
+
+@router.get("/")
 async def root():
     return {
         "message": "Welcome to Medical API",
@@ -113,3 +109,64 @@ async def root():
             "documentation": "/docs"
         }
     }
+
+
+def create_app() -> FastAPI:
+    """
+    Build the application.
+
+    Configuration is resolved here rather than at import time, and no DDL runs
+    on boot; create tables with `python -m app.cli init-db`.
+    """
+    configure_database()
+    if settings.SQL_METRICS_SAMPLE_RATE > 0:
+        for engine in get_engines().values():
+            instrument_engine(engine)
+
+    app = FastAPI(
+        title=settings.PROJECT_NAME,
+        description="FastAPI with PostgreSQL integration for Medical Practice Management",
+        version=settings.VERSION
+    )
+
+    if settings.SQL_METRICS_SAMPLE_RATE > 0:
+        app.add_middleware(
+            SQLMetricsMiddleware,
+            sample_rate=settings.SQL_METRICS_SAMPLE_RATE,
+            repeat_threshold=settings.SQL_METRICS_REPEAT_THRESHOLD
+        )
+
+    app.include_router(router)
+    app.include_router(userlogin.router)
+    app.include_router(auth.router)
+    app.include_router(doctor.router)
+    app.include_router(directory.router)
+    app.include_router(master.router)
+    app.include_router(social.router)
+    app.include_router(posts.router)
+    app.include_router(admin.router)
+    app.include_router(media.router, prefix=settings.MEDIA_URL_PREFIX)
+
+    @app.on_event("startup")
+    async def startup_event():
+        """Initialize services on app startup"""
+        start_scheduler()
+        start_email_queue()
+
+    @app.on_event("shutdown")
+    async def shutdown_event():
+        """Cleanup on app shutdown"""
+        stop_scheduler()
+        await stop_email_queue()
+        await dispose_database()
+
+    return app
+
+
+def __getattr__(name: str):
+    # Keeps `uvicorn app.main:app` working while deferring app creation to first access
+    if name == "app":
+        app = create_app()
+        globals()["app"] = app
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,4 +1,6 @@
 from .post import Post
 from .social_account import SocialAccount
+from .revoked_token import RevokedToken
+from .cache_version import CacheVersion
 
-__all__ = ["Post", "SocialAccount"]
+__all__ = ["Post", "SocialAccount", "RevokedToken", "CacheVersion"]
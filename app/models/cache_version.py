@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from app.db import Base
+
+
+class CacheVersion(Base):
+    __tablename__ = "cache_versions"
+    
+    name = Column(String(50), primary_key=True)  # Cached data set, e.g. "master"
+    version = Column(Integer, nullable=False, default=0)  # Bumped in the same transaction as every write to the data set
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,9 +1,20 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Boolean, Enum, func
+from sqlalchemy import Column, Computed, Float, Integer, String, Text, ForeignKey, DateTime, Boolean, Enum, Index, func
 from sqlalchemy.orm import relationship
 import enum
 from app.db import Base
 
 
+# Number of optional profile fields tracked in Doctor.profile_tips_mask
+# (see PROFILE_FIELDS in app/utils/profile.py)
+PROFILE_FIELD_COUNT = 12
+
+
+def _profile_completeness_sql() -> str:
+    # Percentage of fields whose "missing" bit is clear, in integer arithmetic
+    filled = " + ".join(f"(1 - ((profile_tips_mask >> {bit}) & 1))" for bit in range(PROFILE_FIELD_COUNT))
+    return f"(({filled}) * 100) / {PROFILE_FIELD_COUNT}"
+
+
 class VerificationStatus(enum.Enum):
     PENDING = "pending"
     VERIFIED = "verified"
@@ -39,6 +50,13 @@ class MedicalSubSpeciality(Base):
 
 class Doctor(Base):
     __tablename__ = "doctors"
+    __table_args__ = (
+        # Keyset paging over doctors by completeness
+        Index("ix_doctors_profile_completeness_id", "profile_completeness", "id"),
+        # Nearby search scans geo_cell ranges; speciality and the bounding box
+        # are then checked in the index, so rows outside it are never fetched
+        Index("ix_doctors_geo_cell_location", "geo_cell", "speciality_id", "latitude", "longitude"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     full_name = Column(String(200), nullable=False, index=True)
@@ -47,8 +65,8 @@ class Doctor(Base):
     phone_number = Column(String(20))  # WhatsApp contact number
     clinic_name = Column(String(200))
     clinic_address = Column(Text)
-    speciality_id = Column(Integer, ForeignKey("medical_specialities.id"))
-    sub_speciality_id = Column(Integer, ForeignKey("medical_sub_specialities.id"))
+    speciality_id = Column(Integer, ForeignKey("medical_specialities.id"), index=True)
+    sub_speciality_id = Column(Integer, ForeignKey("medical_sub_specialities.id"), index=True)
     years_of_experience = Column(Integer)
     qualification = Column(String(500))  # Professional qualifications
     medical_institute = Column(String(300))
@@ -56,7 +74,12 @@ class Doctor(Base):
     medical_council_regd_no = Column(String(50), unique=True)
     profile_photo = Column(String(500))  # URL or file path
     professional_bio = Column(Text)  # Professional bio/description
+    latitude = Column(Float)  # Clinic location
+    longitude = Column(Float)
+    geo_cell = Column(Integer)  # Grid cell of (latitude, longitude), see app/utils/geo.py
     is_verified = Column(Enum(VerificationStatus), default=VerificationStatus.PENDING)
+    profile_tips_mask = Column(Integer, default=(1 << PROFILE_FIELD_COUNT) - 1)  # Bit set per missing profile field
+    profile_completeness = Column(Integer, Computed(_profile_completeness_sql(), persisted=True))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -69,9 +92,13 @@ class Doctor(Base):
 
 class OTPVerification(Base):
     __tablename__ = "otp_verifications"
+    __table_args__ = (
+        # One live OTP per email and purpose; also the conflict target for upserts
+        Index("ix_otp_verifications_email_purpose", "email", "purpose", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    email = Column(String(255), nullable=False, index=True)
+    email = Column(String(255), nullable=False)
     otp_code = Column(String(6), nullable=False)
     purpose = Column(String(20), nullable=False)  # registration, login, reset_password
     is_used = Column(Boolean, default=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Enum
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db import Base
@@ -13,6 +13,10 @@ class PostStatus(enum.Enum):
 
 class Post(Base):
     __tablename__ = "posts"
+    __table_args__ = (
+        # Newest-first keyset paging of a doctor's posts
+        Index("ix_posts_doctor_created_id", "doctor_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     doctor_id = Column(Integer, ForeignKey("doctors.id"), nullable=False)
@@ -21,6 +25,7 @@ class Post(Base):
     content = Column(Text, nullable=False)
     media_url = Column(String(500), nullable=True)
     scheduled_at = Column(DateTime(timezone=True), nullable=False)
+    tolerance_minutes = Column(Integer, nullable=True)  # Publish within ± this many minutes of scheduled_at
     status = Column(Enum(PostStatus), default=PostStatus.SCHEDULED)
     error_message = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,46 @@
+from sqlalchemy import DDL, event
+from app.models.models import Doctor
+
+# Text matched by /doctors/search. PostgreSQL only uses the expression indexes
+# below when queries spell the expression exactly like this.
+SEARCH_DOCUMENT_SQL = (
+    "coalesce(full_name, '') || ' ' || coalesce(clinic_name, '') || ' ' || "
+    "coalesce(qualification, '') || ' ' || coalesce(medical_institute, '')"
+)
+
+# Speciality-name matches are OR-ed with the text match; each arm needs an
+# index of its own or the planner falls back to a sequential scan
+SPECIALITY_INDEX_DDL = [
+    "CREATE INDEX IF NOT EXISTS ix_doctors_speciality_id ON doctors (speciality_id)",
+    "CREATE INDEX IF NOT EXISTS ix_doctors_sub_speciality_id ON doctors (sub_speciality_id)",
+]
+
+POSTGRES_SEARCH_DDL = SPECIALITY_INDEX_DDL + [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"CREATE INDEX IF NOT EXISTS ix_doctors_search_tsv ON doctors USING gin (to_tsvector('simple', {SEARCH_DOCUMENT_SQL}))",
+    f"CREATE INDEX IF NOT EXISTS ix_doctors_search_trgm ON doctors USING gin (({SEARCH_DOCUMENT_SQL}) gin_trgm_ops)",
+]
+
+# External-content FTS5 table kept in step with doctors by triggers
+SQLITE_SEARCH_DDL = SPECIALITY_INDEX_DDL + [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS doctors_fts USING fts5("
+    "full_name, clinic_name, qualification, medical_institute, "
+    "content='doctors', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS doctors_fts_ai AFTER INSERT ON doctors BEGIN "
+    "INSERT INTO doctors_fts(rowid, full_name, clinic_name, qualification, medical_institute) "
+    "VALUES (new.id, new.full_name, new.clinic_name, new.qualification, new.medical_institute); END",
+    "CREATE TRIGGER IF NOT EXISTS doctors_fts_ad AFTER DELETE ON doctors BEGIN "
+    "INSERT INTO doctors_fts(doctors_fts, rowid, full_name, clinic_name, qualification, medical_institute) "
+    "VALUES ('delete', old.id, old.full_name, old.clinic_name, old.qualification, old.medical_institute); END",
+    "CREATE TRIGGER IF NOT EXISTS doctors_fts_au AFTER UPDATE OF full_name, clinic_name, qualification, medical_institute "
+    "ON doctors BEGIN "
+    "INSERT INTO doctors_fts(doctors_fts, rowid, full_name, clinic_name, qualification, medical_institute) "
+    "VALUES ('delete', old.id, old.full_name, old.clinic_name, old.qualification, old.medical_institute); "
+    "INSERT INTO doctors_fts(rowid, full_name, clinic_name, qualification, medical_institute) "
+    "VALUES (new.id, new.full_name, new.clinic_name, new.qualification, new.medical_institute); END",
+]
+
+for statement in POSTGRES_SEARCH_DDL:
+    event.listen(Doctor.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+for statement in SQLITE_SEARCH_DDL:
+    event.listen(Doctor.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
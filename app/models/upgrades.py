@@ -0,0 +1,38 @@
+from app.models.models import Doctor
+from app.models.post import Post
+
+# create_all() only creates missing tables, so columns and indexes added to
+# existing tables are listed here and applied by `python -m app.cli upgrade-db`.
+# Append new entries; every step is skipped when it has already been applied.
+UPGRADE_COLUMNS = [
+    Post.__table__.c.tolerance_minutes,
+    Doctor.__table__.c.profile_tips_mask,
+    Doctor.__table__.c.profile_completeness,
+    Doctor.__table__.c.latitude,
+    Doctor.__table__.c.longitude,
+    Doctor.__table__.c.geo_cell,
+]
+
+# Index names; the definitions live on the models
+UPGRADE_INDEXES = [
+    "ix_doctors_profile_completeness_id",
+    "ix_doctors_geo_cell_location",
+    "ix_doctors_speciality_id",
+    "ix_doctors_sub_speciality_id",
+    "ix_posts_doctor_created_id",
+    "ix_otp_verifications_email_purpose",
+]
+
+# Statements run just before an index is created, e.g. to clear rows that
+# would violate a new unique index
+UPGRADE_INDEX_PREPARATION = {
+    # Superseded by the same index extended with latitude and longitude
+    "ix_doctors_geo_cell_location": [
+        "DROP INDEX IF EXISTS ix_doctors_geo_cell_speciality",
+    ],
+    # Keep only the newest code per (email, purpose); older ones are superseded anyway
+    "ix_otp_verifications_email_purpose": [
+        "DELETE FROM otp_verifications WHERE id NOT IN "
+        "(SELECT max(id) FROM otp_verifications GROUP BY email, purpose)",
+    ],
+}
@@ -1,11 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, Header, status
-from sqlalchemy.orm import Session
-from datetime import datetime
-from app.db import get_db
+from fastapi import APIRouter, Depends, HTTPException, Header, Request, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from jose import JWTError
+from app.db import dialect_insert, get_async_db
 from app.models.models import Doctor, VerificationStatus
 from app.config import settings
 from pydantic import BaseModel
-from app.auth import create_access_token, create_refresh_token  
+from app.auth import ALGORITHM, create_access_token, create_refresh_token  
+from app.utils.jwt import decode_token
+from app.utils.revocation import get_revocation_filter, revoke_refresh_token
+from app.utils.rate_limit import enforce_rate_limit
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
@@ -14,16 +18,22 @@ class GoogleAuthRequest(BaseModel):
     email: str
 
 
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
+
+
 @router.post("/verify-google-auth")
-def verify_google_auth(
+async def verify_google_auth(
     request: GoogleAuthRequest,
-    db: Session = Depends(get_db),
+    http_request: Request,
+    db: AsyncSession = Depends(get_async_db),
     # api_key: str = Header(None, alias="APIKEY"),
 ):
     """
     ✅ Verify Google Authentication (with JWT + Refresh token)
     Request body: { "email": "contact.digidr@gmail.com" }
     """
+    await enforce_rate_limit(http_request, "google-auth", request.email)
 
     # if api_key != settings.STATIC_API_KEY:
     #     raise HTTPException(
@@ -40,22 +50,23 @@ def verify_google_auth(
 
     try:
 
-        doctor = db.query(Doctor).filter(Doctor.email == email).first()
-        is_new_user = False
-
-        if not doctor:
-            
-            doctor = Doctor(
-                full_name="",
-                email=email,
-                hashed_password="google_auth_user",  
-                is_verified=VerificationStatus.VERIFIED,
-                created_at=datetime.utcnow()
-            )
-            db.add(doctor)
-            db.commit()
-            db.refresh(doctor)
-            is_new_user = True
+        # Returning users are the common case: the INSERT then skips the
+        # existing row without writing it, and a plain SELECT reads it back
+        columns = (
+            Doctor.id, Doctor.full_name, Doctor.email, Doctor.profile_photo,
+            Doctor.is_verified, Doctor.created_at, Doctor.updated_at
+        )
+        stmt = dialect_insert(db, Doctor).values(
+            full_name="",
+            email=email,
+            hashed_password="google_auth_user",  
+            is_verified=VerificationStatus.VERIFIED
+        ).on_conflict_do_nothing(index_elements=[Doctor.email]).returning(*columns)
+        doctor = (await db.execute(stmt)).one_or_none()
+        is_new_user = doctor is not None
+        if doctor is None:
+            doctor = (await db.execute(select(*columns).where(Doctor.email == email))).one()
+        await db.commit()
 
 
         token_data = {"sub": str(doctor.id), "email": doctor.email}
@@ -89,3 +100,49 @@ def verify_google_auth(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred during Google authentication: {str(e)}"
         )
+
+
+@router.post("/refresh")
+async def refresh_tokens(
+    request: RefreshTokenRequest,
+    http_request: Request,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Exchange a refresh token for a new access/refresh token pair.
+
+    Each refresh token can be redeemed once. Revoked tokens are rejected from
+    the in-memory filter without a query; the revocation insert is what
+    catches a token replayed on another worker before the filter syncs.
+    """
+    await enforce_rate_limit(http_request, "refresh")
+
+    invalid_token = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid or expired refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        claims = decode_token(request.refresh_token, settings.AUTH_SECRET_KEY, ALGORITHM)
+    except JWTError:
+        raise invalid_token
+
+    jti = claims.get("jti")
+    if claims.get("type") != "refresh" or not jti or not claims.get("sub"):
+        raise invalid_token
+    if jti in get_revocation_filter():
+        raise invalid_token
+
+    try:
+        doctor_id = int(claims["sub"])
+    except (ValueError, TypeError):
+        raise invalid_token
+    if not await revoke_refresh_token(db, jti, doctor_id, claims["exp"]):
+        raise invalid_token
+
+    token_data = {"sub": claims["sub"], "email": claims.get("email")}
+    return {
+        "access_token": create_access_token(token_data),
+        "refresh_token": create_refresh_token(token_data),
+        "token_type": "bearer"
+    }
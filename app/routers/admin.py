@@ -0,0 +1,148 @@
+import hmac
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Request, status
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from app.config import settings
+from app.db import get_async_db, get_async_read_db
+from app.models.models import Doctor, VerificationStatus
+from app.schemas.admin import DoctorImportReport, IncompleteProfile, IncompleteProfilesResponse
+from app.utils.doctor_import import import_doctors, iter_csv_records, iter_lines, iter_ndjson_records
+from app.utils.export import export_response
+from app.utils.master_cache import get_master_cache
+from app.utils.pagination import decode_cursor, encode_cursor
+from app.utils.profile import missing_fields_from_mask
+
+
+def require_api_key(api_key: Optional[str] = Header(None, alias="APIKEY")):
+    """Admin endpoints are authenticated with the static API key."""
+    if not settings.STATIC_API_KEY or not api_key or not hmac.compare_digest(api_key, settings.STATIC_API_KEY):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid API Key"
+        )
+
+
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(require_api_key)])
+
+IMPORT_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+
+@router.get("/doctors/incomplete", response_model=IncompleteProfilesResponse)
+async def list_incomplete_profiles(
+    db: AsyncSession = Depends(get_async_read_db),
+    below: int = Query(60, ge=1, le=100, description="List doctors whose profile completeness is below this percentage"),
+    limit: int = Query(100, ge=1, le=1000, description="Number of records to return"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page")
+):
+    """
+    Doctors with incomplete profiles, least complete first.
+
+    Keyset-paged over the (profile_completeness, id) index, so every page
+    costs the same however deep the caller goes.
+    """
+    query = (
+        select(Doctor.id, Doctor.full_name, Doctor.email, Doctor.profile_completeness, Doctor.profile_tips_mask)
+        .where(Doctor.profile_completeness < below)
+        .order_by(Doctor.profile_completeness, Doctor.id)
+        .limit(limit + 1)
+    )
+    after = decode_cursor(cursor, int, int)
+    if after is not None:
+        query = query.where(tuple_(Doctor.profile_completeness, Doctor.id) > tuple_(*after))
+
+    rows = (await db.execute(query)).all()
+    page = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last = page[-1]
+        next_cursor = encode_cursor(last.profile_completeness, last.id)
+
+    return IncompleteProfilesResponse(
+        doctors=[
+            IncompleteProfile(
+                id=row.id,
+                full_name=row.full_name,
+                email=row.email,
+                profile_completeness=row.profile_completeness,
+                missing_fields=missing_fields_from_mask(row.profile_tips_mask)
+            )
+            for row in page
+        ],
+        next_cursor=next_cursor
+    )
+
+
+@router.post("/doctors/import", response_model=DoctorImportReport)
+async def bulk_import_doctors(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$", description="Defaults to the request's Content-Type")
+):
+    """
+    Onboard doctors from a CSV (with header row) or NDJSON request body.
+
+    Rows are validated like registrations and may name their speciality and
+    sub-speciality instead of giving ids. Valid rows are inserted unverified
+    and without a password; every rejected row is listed in the report.
+    """
+    if format is None:
+        content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+        format = IMPORT_CONTENT_TYPES.get(content_type)
+        if format is None:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="Send text/csv or application/x-ndjson, or pass format"
+            )
+
+    snapshot = await get_master_cache().get(db)
+    lines = iter_lines(request.stream())
+    records = iter_csv_records(lines) if format == "csv" else iter_ndjson_records(lines)
+    return await import_doctors(db, records, snapshot)
+
+
+@router.get("/doctors/export")
+async def export_doctors(
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    is_verified: Optional[VerificationStatus] = Query(None, description="Only doctors with this verification status"),
+    speciality_id: Optional[int] = Query(None, description="Only doctors in this speciality"),
+    created_from: Optional[datetime] = Query(None, description="Only doctors registered at or after this time"),
+    created_to: Optional[datetime] = Query(None, description="Only doctors registered before this time")
+):
+    """Download doctor profiles as NDJSON or CSV, streamed and gzipped."""
+    query = select(
+        Doctor.id,
+        Doctor.full_name,
+        Doctor.email,
+        Doctor.phone_number,
+        Doctor.clinic_name,
+        Doctor.clinic_address,
+        Doctor.speciality_id,
+        Doctor.sub_speciality_id,
+        Doctor.years_of_experience,
+        Doctor.qualification,
+        Doctor.medical_institute,
+        Doctor.medical_council_regd_no,
+        Doctor.latitude,
+        Doctor.longitude,
+        Doctor.is_verified,
+        Doctor.profile_completeness,
+        Doctor.created_at,
+        Doctor.updated_at,
+    ).order_by(Doctor.id)
+    if is_verified is not None:
+        query = query.where(Doctor.is_verified == is_verified)
+    if speciality_id is not None:
+        query = query.where(Doctor.speciality_id == speciality_id)
+    if created_from is not None:
+        query = query.where(Doctor.created_at >= created_from)
+    if created_to is not None:
+        query = query.where(Doctor.created_at < created_to)
+    return export_response(request, query, format, "doctors")
@@ -1,31 +1,39 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 from typing import Annotated
 
-from app.db import get_db
+from app.db import get_async_db
 from app.models.models import Doctor, VerificationStatus
 from app.schemas.auth import (
     DoctorRegisterRequest, OTPVerificationRequest, LoginRequest, 
     TokenResponse, OTPResponse
 )
-from app.utils.jwt import (
-    verify_password, get_password_hash, create_access_token, 
-    get_current_user_id
-)
+from app.utils.jwt import create_access_token, get_current_user_id
+from app.utils.password import hash_password, verify_and_update_password
 from app.utils.otp import create_otp, verify_otp, send_otp_email
+from app.utils.profile import missing_fields_mask
+from app.utils.principal import DoctorPrincipal, get_principal_cache, invalidate_principal
+from app.utils.rate_limit import enforce_rate_limit
 from app.config import settings
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 security = HTTPBearer()
 
 
-def get_current_doctor(
+async def get_current_doctor(
     credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
-    db: Session = Depends(get_db)
-):
-    """Get the current authenticated doctor."""
+    db: AsyncSession = Depends(get_async_db)
+) -> DoctorPrincipal:
+    """
+    Get the current authenticated doctor.
+
+    Returns a cached snapshot, so most requests authenticate without a query;
+    handlers that need the full row load it themselves.
+    """
     token = credentials.credentials
     user_id = get_current_user_id(token)
     
@@ -36,7 +44,12 @@ def get_current_doctor(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    doctor = db.query(Doctor).filter(Doctor.id == user_id).first()
+    principal_cache = get_principal_cache()
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+    
+    doctor = await db.scalar(select(Doctor).where(Doctor.id == user_id))
     if doctor is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -44,60 +57,76 @@ def get_current_doctor(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    return doctor
+    principal = DoctorPrincipal.from_doctor(doctor)
+    principal_cache.set(user_id, principal)
+    return principal
+
+
+# SQLSTATE codes (PostgreSQL drivers) and extended result codes (sqlite3)
+UNIQUE_VIOLATIONS = {"23505", "SQLITE_CONSTRAINT_UNIQUE"}
+FOREIGN_KEY_VIOLATIONS = {"23503", "SQLITE_CONSTRAINT_FOREIGNKEY"}
+
+
+def registration_conflict(error: IntegrityError) -> Exception:
+    """
+    Map an integrity error from a doctor INSERT or UPDATE to the matching 400 error.
+
+    Only unique and foreign-key violations are conflicts the client can fix;
+    anything else (e.g. NOT NULL) is returned unchanged to be re-raised.
+    """
+    code = getattr(error.orig, "sqlstate", None) or getattr(error.orig, "sqlite_errorname", None)
+    message = str(error.orig)
+    if code in UNIQUE_VIOLATIONS and "medical_council_regd_no" in message:
+        detail = "Medical council registration number already exists"
+    elif code in UNIQUE_VIOLATIONS and "email" in message:
+        detail = "Doctor with this email already exists"
+    elif code in FOREIGN_KEY_VIOLATIONS:
+        detail = "Invalid speciality or sub-speciality"
+    else:
+        return error
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
 
 
 @router.post("/register", response_model=OTPResponse)
 async def register_doctor(
+    request: Request,
     doctor_data: DoctorRegisterRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Register a new doctor and send OTP for verification."""
-    # Check if doctor already exists
-    existing_doctor = db.query(Doctor).filter(Doctor.email == doctor_data.email).first()
-    if existing_doctor:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Doctor with this email already exists"
-        )
+    await enforce_rate_limit(request, "register", doctor_data.email)
     
-    # Check if medical council registration number is already used
-    if doctor_data.medical_council_regd_no:
-        existing_reg = db.query(Doctor).filter(
-            Doctor.medical_council_regd_no == doctor_data.medical_council_regd_no
-        ).first()
-        if existing_reg:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Medical council registration number already exists"
-            )
-    
-    # Create doctor record
-    hashed_password = get_password_hash(doctor_data.password)
-    new_doctor = Doctor(
-        full_name=doctor_data.full_name,
-        email=doctor_data.email,
-        hashed_password=hashed_password,
-        phone_number=doctor_data.phone_number,
-        clinic_name=doctor_data.clinic_name,
-        clinic_address=doctor_data.clinic_address,
-        speciality_id=doctor_data.speciality_id,
-        sub_speciality_id=doctor_data.sub_speciality_id,
-        years_of_experience=doctor_data.years_of_experience,
-        qualification=doctor_data.qualification,
-        medical_institute=doctor_data.medical_institute,
-        awards=doctor_data.awards,
-        medical_council_regd_no=doctor_data.medical_council_regd_no,
-        profile_photo=doctor_data.profile_photo,
-        professional_bio=doctor_data.professional_bio,
-        is_verified=VerificationStatus.PENDING
-    )
+    hashed_password = await hash_password(doctor_data.password)
     
-    db.add(new_doctor)
-    db.commit()
+    # Uniqueness of email and registration number is enforced by the INSERT itself;
+    # the doctor row and its OTP are written in one transaction
+    try:
+        await db.execute(insert(Doctor).values(
+            full_name=doctor_data.full_name,
+            email=doctor_data.email,
+            hashed_password=hashed_password,
+            phone_number=doctor_data.phone_number,
+            clinic_name=doctor_data.clinic_name,
+            clinic_address=doctor_data.clinic_address,
+            speciality_id=doctor_data.speciality_id,
+            sub_speciality_id=doctor_data.sub_speciality_id,
+            years_of_experience=doctor_data.years_of_experience,
+            qualification=doctor_data.qualification,
+            medical_institute=doctor_data.medical_institute,
+            awards=doctor_data.awards,
+            medical_council_regd_no=doctor_data.medical_council_regd_no,
+            profile_photo=doctor_data.profile_photo,
+            professional_bio=doctor_data.professional_bio,
+            profile_tips_mask=missing_fields_mask(doctor_data.model_dump()),
+            is_verified=VerificationStatus.PENDING
+        ))
+        otp_code, expires_at = await create_otp(db, doctor_data.email, "registration", commit=False)
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        raise registration_conflict(e)
     
-    # Generate and send OTP
-    otp_code, expires_at = create_otp(db, doctor_data.email, "registration")
+    # Send OTP
     send_otp_email(doctor_data.email, otp_code, "registration")
     
     return OTPResponse(
@@ -109,19 +138,22 @@ async def register_doctor(
 
 @router.post("/verify-registration", response_model=TokenResponse)
 async def verify_registration(
+    request: Request,
     verification_data: OTPVerificationRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Verify OTP and complete registration."""
+    await enforce_rate_limit(request, "verify-registration", verification_data.email)
+    
     # Verify OTP
-    if not verify_otp(db, verification_data.email, verification_data.otp_code, "registration"):
+    if not await verify_otp(db, verification_data.email, verification_data.otp_code, "registration"):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid or expired OTP"
         )
     
     # Get the doctor
-    doctor = db.query(Doctor).filter(Doctor.email == verification_data.email).first()
+    doctor = await db.scalar(select(Doctor).where(Doctor.email == verification_data.email))
     if not doctor:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -129,10 +161,11 @@ async def verify_registration(
         )
     
     # Mark doctor as verified
-    db.query(Doctor).filter(Doctor.id == doctor.id).update({
-        "is_verified": VerificationStatus.VERIFIED
-    })
-    db.commit()
+    await db.execute(update(Doctor).where(Doctor.id == doctor.id).values(
+        is_verified=VerificationStatus.VERIFIED
+    ))
+    await db.commit()
+    invalidate_principal(doctor.id)
     
     # Create access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -148,24 +181,33 @@ async def verify_registration(
 
 @router.post("/login", response_model=OTPResponse)
 async def login_request(
+    request: Request,
     login_data: LoginRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Request login and send OTP."""
+    await enforce_rate_limit(request, "login", login_data.email)
+    
     # Check if doctor exists and password is correct
-    doctor = db.query(Doctor).filter(Doctor.email == login_data.email).first()
+    doctor = await db.scalar(select(Doctor).where(Doctor.email == login_data.email))
     if not doctor:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
         )
     
-    if not verify_password(login_data.password, str(doctor.hashed_password)):
+    password_valid, new_hash = await verify_and_update_password(login_data.password, doctor.hashed_password)
+    if not password_valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
         )
     
+    # Transparently upgrade hashes made with an outdated bcrypt cost
+    if new_hash:
+        await db.execute(update(Doctor).where(Doctor.id == doctor.id).values(hashed_password=new_hash))
+        await db.commit()
+    
     # Check if doctor is verified
     if doctor.is_verified != VerificationStatus.VERIFIED:
         raise HTTPException(
@@ -174,7 +216,7 @@ async def login_request(
         )
     
     # Generate and send OTP
-    otp_code, expires_at = create_otp(db, login_data.email, "login")
+    otp_code, expires_at = await create_otp(db, login_data.email, "login")
     send_otp_email(login_data.email, otp_code, "login")
     
     return OTPResponse(
@@ -186,19 +228,22 @@ async def login_request(
 
 @router.post("/verify-login", response_model=TokenResponse)
 async def verify_login(
+    request: Request,
     verification_data: OTPVerificationRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Verify OTP and complete login."""
+    await enforce_rate_limit(request, "verify-login", verification_data.email)
+    
     # Verify OTP
-    if not verify_otp(db, verification_data.email, verification_data.otp_code, "login"):
+    if not await verify_otp(db, verification_data.email, verification_data.otp_code, "login"):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid or expired OTP"
         )
     
     # Get the doctor
-    doctor = db.query(Doctor).filter(Doctor.email == verification_data.email).first()
+    doctor = await db.scalar(select(Doctor).where(Doctor.email == verification_data.email))
     if not doctor:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
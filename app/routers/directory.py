@@ -0,0 +1,102 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from app.db import get_async_read_db
+from app.models.models import Doctor, VerificationStatus
+from app.schemas.directory import DoctorSearchResponse, DoctorSearchResult, NearbyDoctor, NearbyDoctorsResponse
+from app.utils.geo import nearby_doctors
+from app.utils.master_cache import get_master_cache
+from app.utils.pagination import decode_cursor, encode_cursor
+from app.utils.search import search_doctors
+
+router = APIRouter(prefix="/doctors", tags=["Doctor Directory"])
+
+
+@router.get("/search", response_model=DoctorSearchResponse)
+async def search_directory(
+    db: AsyncSession = Depends(get_async_read_db),
+    q: str = Query(..., min_length=2, max_length=100, description="Name, clinic, qualification, institute or speciality"),
+    speciality_id: Optional[int] = Query(None, description="Filter by speciality ID"),
+    sub_speciality_id: Optional[int] = Query(None, description="Filter by sub-speciality ID"),
+    is_verified: Optional[VerificationStatus] = Query(None, description="Filter by verification status"),
+    limit: int = Query(20, ge=1, le=100, description="Number of records to return"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page")
+):
+    """Search doctors by relevance, fuzzy-matching text fields and speciality names."""
+    filters = []
+    if speciality_id:
+        filters.append(Doctor.speciality_id == speciality_id)
+    if sub_speciality_id:
+        filters.append(Doctor.sub_speciality_id == sub_speciality_id)
+    if is_verified:
+        filters.append(Doctor.is_verified == is_verified)
+
+    master = await get_master_cache().get(db)
+    rows = await search_doctors(db, q, master, filters, decode_cursor(cursor, float, int), limit)
+
+    page = rows[:limit]
+    next_cursor = encode_cursor(page[-1].score, page[-1].id) if len(rows) > limit else None
+    return DoctorSearchResponse(
+        results=[
+            DoctorSearchResult(
+                id=row.id,
+                full_name=row.full_name,
+                clinic_name=row.clinic_name,
+                qualification=row.qualification,
+                medical_institute=row.medical_institute,
+                speciality_id=row.speciality_id,
+                speciality_name=master.speciality_name(row.speciality_id),
+                sub_speciality_id=row.sub_speciality_id,
+                sub_speciality_name=master.sub_speciality_name(row.sub_speciality_id),
+                profile_photo=row.profile_photo,
+                is_verified=row.is_verified.value if row.is_verified else None,
+                score=row.score
+            )
+            for row in page
+        ],
+        next_cursor=next_cursor
+    )
+
+
+@router.get("/nearby", response_model=NearbyDoctorsResponse)
+async def find_nearby_doctors(
+    db: AsyncSession = Depends(get_async_read_db),
+    lat: float = Query(..., ge=-90, le=90, description="Latitude of the patient"),
+    lon: float = Query(..., ge=-180, le=180, description="Longitude of the patient"),
+    radius_km: float = Query(25, gt=0, le=200, description="Search radius in kilometres"),
+    limit: int = Query(20, ge=1, le=100, description="Return at most this many nearest doctors"),
+    speciality_id: Optional[int] = Query(None, description="Filter by speciality ID"),
+    sub_speciality_id: Optional[int] = Query(None, description="Filter by sub-speciality ID"),
+    is_verified: Optional[VerificationStatus] = Query(None, description="Filter by verification status")
+):
+    """Nearest doctors to a location, within a radius, by clinic location."""
+    filters = []
+    if speciality_id:
+        filters.append(Doctor.speciality_id == speciality_id)
+    if sub_speciality_id:
+        filters.append(Doctor.sub_speciality_id == sub_speciality_id)
+    if is_verified:
+        filters.append(Doctor.is_verified == is_verified)
+
+    found = await nearby_doctors(db, lat, lon, radius_km, limit, filters)
+    master = await get_master_cache().get(db)
+    return NearbyDoctorsResponse(
+        results=[
+            NearbyDoctor(
+                id=row.id,
+                full_name=row.full_name,
+                clinic_name=row.clinic_name,
+                clinic_address=row.clinic_address,
+                speciality_id=row.speciality_id,
+                speciality_name=master.speciality_name(row.speciality_id),
+                sub_speciality_id=row.sub_speciality_id,
+                sub_speciality_name=master.sub_speciality_name(row.sub_speciality_id),
+                profile_photo=row.profile_photo,
+                latitude=row.latitude,
+                longitude=row.longitude,
+                distance_km=round(distance, 3)
+            )
+            for distance, row in found
+        ],
+        radius_km=radius_km
+    )
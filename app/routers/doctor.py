@@ -1,108 +1,205 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import Annotated
-from app.db import get_db
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from typing import Annotated, Optional
+from app.db import get_async_db, get_async_read_db
 from app.models.models import Doctor, MedicalSpeciality, MedicalSubSpeciality
-from app.schemas.doctor import DoctorResponse, DoctorUpdate
-from app.routers.auth import get_current_doctor
-from app.utils.profile import calculate_profile_completeness, get_profile_completeness_tips
+from app.schemas.doctor import DoctorBase, DoctorResponse, DoctorUpdate, ProfilePhotoResponse
+from app.routers.auth import get_current_doctor, registration_conflict
+from app.utils.etag import etag_matches, make_etag, not_modified, timestamp_marker
+from app.utils.geo import geo_cell
+from app.utils.master_cache import get_master_cache
+from app.utils.media import PHOTO_FIELD, media_url, save_photo
+from app.utils.principal import DoctorPrincipal, invalidate_principal
+from app.utils.profile import calculate_profile_completeness, get_profile_completeness_tips, tips_mask_update
 
 router = APIRouter(prefix="/doctor", tags=["Doctor Profile"])
 
+# The photo endpoint parses its body itself, so the schema is declared here
+PHOTO_UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {"multipart/form-data": {"schema": {
+            "type": "object",
+            "required": [PHOTO_FIELD],
+            "properties": {PHOTO_FIELD: {"type": "string", "format": "binary"}},
+        }}},
+    }
+}
+
+
+def profile_etag_headers(doctor_id: int, updated_at: Optional[datetime], created_at: Optional[datetime]) -> dict[str, str]:
+    """ETag for a doctor's profile; every write to the row moves updated_at."""
+    return {
+        "ETag": make_etag("p", doctor_id, timestamp_marker(updated_at, created_at)),
+        "Cache-Control": "private, no-cache",
+    }
+
+
+def build_profile_response(
+    doctor: Doctor,
+    speciality_name: Optional[str],
+    sub_speciality_name: Optional[str]
+) -> DoctorResponse:
+    """Serialize a doctor row and its speciality names in a single validation pass."""
+    completeness_percentage = calculate_profile_completeness(doctor)
+    return DoctorResponse(
+        **{name: getattr(doctor, name) for name in DoctorBase.model_fields},
+        id=doctor.id,
+        is_verified=doctor.is_verified.value if doctor.is_verified else "",
+        created_at=doctor.created_at,
+        updated_at=doctor.updated_at,
+        speciality_name=speciality_name,
+        sub_speciality_name=sub_speciality_name,
+        completeness_percentage=completeness_percentage,
+        completeness_tips=get_profile_completeness_tips(doctor) if completeness_percentage < 100 else None
+    )
+
+
+async def read_profile(db: AsyncSession, doctor_id: int, response: Response) -> DoctorResponse:
+    """Load a profile and set its ETag on the response."""
+    # Doctor row and speciality names in one query
+    row = (await db.execute(
+        select(Doctor, MedicalSpeciality.name, MedicalSubSpeciality.name)
+        .outerjoin(MedicalSpeciality, MedicalSpeciality.id == Doctor.speciality_id)
+        .outerjoin(MedicalSubSpeciality, MedicalSubSpeciality.id == Doctor.sub_speciality_id)
+        .where(Doctor.id == doctor_id)
+        .execution_options(populate_existing=True)
+    )).first()
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Doctor not found"
+        )
+
+    doctor, speciality_name, sub_speciality_name = row
+    response.headers.update(profile_etag_headers(doctor.id, doctor.updated_at, doctor.created_at))
+    return build_profile_response(doctor, speciality_name, sub_speciality_name)
+
 
 @router.get("/profile", response_model=DoctorResponse)
 async def get_doctor_profile(
-    current_doctor: Annotated[Doctor, Depends(get_current_doctor)],
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    current_doctor: Annotated[DoctorPrincipal, Depends(get_current_doctor)],
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get the logged-in doctor's profile."""
-    # Get speciality and sub-speciality names
-    speciality_name = None
-    sub_speciality_name = None
-    
-    if current_doctor.speciality_id is not None:
-        speciality = db.query(MedicalSpeciality).filter(
-            MedicalSpeciality.id == current_doctor.speciality_id
-        ).first()
-        if speciality:
-            speciality_name = speciality.name
-    
-    if current_doctor.sub_speciality_id is not None:
-        sub_speciality = db.query(MedicalSubSpeciality).filter(
-            MedicalSubSpeciality.id == current_doctor.sub_speciality_id
-        ).first()
-        if sub_speciality:
-            sub_speciality_name = sub_speciality.name
-    
-    # Calculate profile completeness
-    completeness_percentage = calculate_profile_completeness(current_doctor)
-    completeness_tips = get_profile_completeness_tips(current_doctor)
-    
-    # Create response with additional fields
-    doctor_dict = DoctorResponse.model_validate(current_doctor).model_dump()
-    doctor_dict['speciality_name'] = speciality_name
-    doctor_dict['sub_speciality_name'] = sub_speciality_name
-    doctor_dict['completeness_percentage'] = completeness_percentage
-    doctor_dict['completeness_tips'] = completeness_tips if completeness_percentage < 100 else None
-    
-    return DoctorResponse(**doctor_dict)
+    # The principal already carries updated_at, so a revalidation needs no query
+    headers = profile_etag_headers(current_doctor.id, current_doctor.updated_at, current_doctor.created_at)
+    if etag_matches(request, headers["ETag"]):
+        return not_modified(headers)
+    return await read_profile(db, current_doctor.id, response)
 
 
 @router.put("/profile", response_model=DoctorResponse)
 async def update_doctor_profile(
+    response: Response,
     profile_data: DoctorUpdate,
-    current_doctor: Annotated[Doctor, Depends(get_current_doctor)],
-    db: Session = Depends(get_db)
+    current_doctor: Annotated[DoctorPrincipal, Depends(get_current_doctor)],
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update the logged-in doctor's profile."""
-    # Check if medical council registration number is already used by another doctor
-    if profile_data.medical_council_regd_no:
-        existing_reg = db.query(Doctor).filter(
-            Doctor.medical_council_regd_no == profile_data.medical_council_regd_no,
-            Doctor.id != current_doctor.id
-        ).first()
-        if existing_reg:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Medical council registration number already exists"
-            )
-    
-    # Validate speciality and sub-speciality if provided
-    if profile_data.speciality_id:
-        speciality = db.query(MedicalSpeciality).filter(
-            MedicalSpeciality.id == profile_data.speciality_id
-        ).first()
-        if not speciality:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid speciality ID"
-            )
-    
+    # Validate speciality and sub-speciality against the cached master data,
+    # reloading once in case they were created after the cache was filled
+    master = get_master_cache()
+    snapshot = await master.get(db)
+    if (
+        (profile_data.speciality_id and profile_data.speciality_id not in snapshot.specialities)
+        or (profile_data.sub_speciality_id and profile_data.sub_speciality_id not in snapshot.sub_specialities)
+    ):
+        snapshot = await master.get(db, refresh=True)
+
+    if profile_data.speciality_id and profile_data.speciality_id not in snapshot.specialities:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid speciality ID"
+        )
+
     if profile_data.sub_speciality_id:
-        sub_speciality = db.query(MedicalSubSpeciality).filter(
-            MedicalSubSpeciality.id == profile_data.sub_speciality_id
-        ).first()
-        if not sub_speciality:
+        sub_speciality = snapshot.sub_specialities.get(profile_data.sub_speciality_id)
+        if sub_speciality is None:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Invalid sub-speciality ID"
             )
-        
+
         # Check if sub-speciality belongs to the selected speciality
-        if profile_data.speciality_id and sub_speciality.speciality_id != profile_data.speciality_id:
+        if profile_data.speciality_id and sub_speciality[0] != profile_data.speciality_id:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Sub-speciality does not belong to the selected speciality"
             )
-    
-    # Update doctor profile
+
     update_data = profile_data.model_dump(exclude_unset=True)
-    if update_data:
-        db.query(Doctor).filter(Doctor.id == current_doctor.id).update(update_data)
-        db.commit()
-        
-        # Refresh the doctor object
-        db.refresh(current_doctor)
-    
-    # Get updated profile with speciality names and completeness
-    return await get_doctor_profile(current_doctor, db)
\ No newline at end of file
+    if "latitude" in update_data:
+        update_data["geo_cell"] = geo_cell(profile_data.latitude, profile_data.longitude)
+    if not update_data:
+        return await read_profile(db, current_doctor.id, response)
+
+    # Update and read back the row in one statement; the unique constraint
+    # on medical_council_regd_no replaces the pre-check query
+    try:
+        doctor = await db.scalar(
+            update(Doctor)
+            .where(Doctor.id == current_doctor.id)
+            .values(**update_data, profile_tips_mask=tips_mask_update(update_data))
+            .returning(Doctor)
+        )
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        raise registration_conflict(e)
+    invalidate_principal(current_doctor.id)
+
+    if doctor is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Doctor not found"
+        )
+
+    if (
+        (doctor.speciality_id and doctor.speciality_id not in snapshot.specialities)
+        or (doctor.sub_speciality_id and doctor.sub_speciality_id not in snapshot.sub_specialities)
+    ):
+        snapshot = await master.get(db, refresh=True)
+
+    response.headers.update(profile_etag_headers(doctor.id, doctor.updated_at, doctor.created_at))
+    return build_profile_response(
+        doctor,
+        snapshot.speciality_name(doctor.speciality_id),
+        snapshot.sub_speciality_name(doctor.sub_speciality_id)
+    )
+
+
+@router.post("/profile/photo", response_model=ProfilePhotoResponse, openapi_extra=PHOTO_UPLOAD_OPENAPI)
+async def upload_profile_photo(
+    request: Request,
+    current_doctor: Annotated[DoctorPrincipal, Depends(get_current_doctor)],
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Upload the logged-in doctor's profile photo (JPEG, PNG or WebP) as a multipart 'photo' field."""
+    name, thumbnails = await save_photo(request)
+
+    profile_photo = media_url(name)
+    changes = {"profile_photo": profile_photo}
+    result = await db.execute(
+        update(Doctor)
+        .where(Doctor.id == current_doctor.id)
+        .values(**changes, profile_tips_mask=tips_mask_update(changes))
+    )
+    await db.commit()
+    invalidate_principal(current_doctor.id)
+
+    if result.rowcount == 0:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Doctor not found"
+        )
+
+    return ProfilePhotoResponse(
+        profile_photo=profile_photo,
+        thumbnails={size: media_url(thumbnail) for size, thumbnail in thumbnails.items()}
+    )
@@ -1,12 +1,16 @@
-from fastapi import APIRouter, Depends, Query,HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query,HTTPException, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 from app.routers.auth import get_current_doctor
-from app.db import get_db
+from app.db import get_async_db, get_async_read_db
 from typing import Annotated
-from app.models.models import MedicalSpeciality, MedicalSubSpeciality,Doctor
+from app.models.models import MedicalSpeciality, MedicalSubSpeciality
+from app.utils.etag import etag_matches, make_etag, not_modified
+from app.utils.master_cache import AUTOCOMPLETE_MAX_RESULTS, MasterSnapshot, bump_master_version, get_master_cache
+from app.utils.principal import DoctorPrincipal
 from app.schemas.master import (
-    SpecialitiesListResponse, SubSpecialitiesListResponse,
+    AutocompleteMatch, AutocompleteResponse, MasterTreeResponse, SpecialitiesListResponse, SubSpecialitiesListResponse,
     MedicalSpecialityResponse, MedicalSubSpecialityResponse,
     CreateSpeciality, CreateSubSpeciality
 
@@ -15,72 +19,98 @@ from app.schemas.master import (
 router = APIRouter(prefix="/master", tags=["Master Data"])
 
 
+def master_etag_headers(snapshot: MasterSnapshot) -> dict[str, str]:
+    """ETag for the master data, taken from the snapshot's cache_versions version."""
+    return {"ETag": make_etag("m", snapshot.version), "Cache-Control": "public, no-cache"}
+
+
 @router.get("/specialities", response_model=SpecialitiesListResponse)
 async def get_specialities(
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_async_read_db),
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(100, ge=1, le=500, description="Number of records to return")
 ):
     """Get list of all medical specialities."""
-    specialities = db.query(MedicalSpeciality).offset(skip).limit(limit).all()
-    total = db.query(MedicalSpeciality).count()
-    
-    specialities_data = [
-        MedicalSpecialityResponse.model_validate(speciality) 
-        for speciality in specialities
-    ]
-    
-    return SpecialitiesListResponse(
-        specialities=specialities_data,
-        total=total
-    )
+    # Served from the master data snapshot; no queries while it is warm
+    snapshot = await get_master_cache().get(db)
+    headers = master_etag_headers(snapshot)
+    if etag_matches(request, headers["ETag"]):
+        return not_modified(headers)
+    return Response(snapshot.specialities_json(skip, limit), media_type="application/json", headers=headers)
 
 
 @router.get("/sub-specialities", response_model=SubSpecialitiesListResponse)
 async def get_sub_specialities(
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_async_read_db),
     speciality_id: Optional[int] = Query(None, description="Filter by speciality ID"),
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(100, ge=1, le=500, description="Number of records to return")
 ):
     """Get list of medical sub-specialities, optionally filtered by speciality."""
-    query = db.query(MedicalSubSpeciality)
-    
-    if speciality_id:
-        query = query.filter(MedicalSubSpeciality.speciality_id == speciality_id)
-    
-    sub_specialities = query.offset(skip).limit(limit).all()
-    total = query.count()
-    
-    # Prepare response data with speciality names
-    sub_specialities_data = []
-    for sub_speciality in sub_specialities:
-        sub_speciality_data = MedicalSubSpecialityResponse.model_validate(sub_speciality)
-        
-        # Get speciality name
-        if sub_speciality.speciality:
-            sub_speciality_data.speciality_name = sub_speciality.speciality.name
-        
-        sub_specialities_data.append(sub_speciality_data)
-    
-    return SubSpecialitiesListResponse(
-        sub_specialities=sub_specialities_data,
-        total=total,
-        speciality_id=speciality_id
+    snapshot = await get_master_cache().get(db)
+    headers = master_etag_headers(snapshot)
+    if etag_matches(request, headers["ETag"]):
+        return not_modified(headers)
+    return Response(
+        snapshot.sub_specialities_json(speciality_id, skip, limit),
+        media_type="application/json",
+        headers=headers
     )
 
 
 
+@router.get("/tree", response_model=MasterTreeResponse)
+async def get_master_tree(
+    request: Request,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Get every speciality with its sub-specialities, for building dropdowns in one request."""
+    snapshot = await get_master_cache().get(db)
+    headers = master_etag_headers(snapshot)
+    if etag_matches(request, headers["ETag"]):
+        return not_modified(headers)
+    return Response(snapshot.tree_json(), media_type="application/json", headers=headers)
+
+
+@router.get("/autocomplete", response_model=AutocompleteResponse)
+async def autocomplete_master(
+    db: AsyncSession = Depends(get_async_read_db),
+    q: str = Query(..., min_length=1, max_length=100, description="What the user has typed so far"),
+    limit: int = Query(8, ge=1, le=AUTOCOMPLETE_MAX_RESULTS, description="Number of matches to return")
+):
+    """Specialities and sub-specialities with a word starting with q, ignoring case and accents."""
+    cache = get_master_cache()
+    snapshot = await cache.get(db)
+    matches = []
+    for kind, id in cache.autocomplete(q, limit):
+        if kind == "speciality":
+            matches.append(AutocompleteMatch(type=kind, id=id, name=snapshot.specialities[id]))
+        else:
+            speciality_id, name = snapshot.sub_specialities[id]
+            matches.append(AutocompleteMatch(
+                type=kind,
+                id=id,
+                name=name,
+                speciality_id=speciality_id,
+                speciality_name=snapshot.speciality_name(speciality_id)
+            ))
+    return AutocompleteResponse(matches=matches)
+
+
 @router.post("/speciality", response_model=MedicalSpecialityResponse)
 async def create_speciality(
     data: CreateSpeciality,
-    db: Session = Depends(get_db),
-    current_doctor: Doctor = Depends(get_current_doctor),
+    db: AsyncSession = Depends(get_async_db),
+    current_doctor: DoctorPrincipal = Depends(get_current_doctor),
 ):
     speciality = MedicalSpeciality(name=data.name)
     db.add(speciality)
-    db.commit()
-    db.refresh(speciality)
+    await bump_master_version(db)
+    await db.commit()
+    await db.refresh(speciality)
+    get_master_cache().invalidate()
     return MedicalSpecialityResponse.model_validate(speciality)
 
 
@@ -91,13 +121,13 @@ async def create_speciality(
 @router.post("/sub-speciality", response_model=MedicalSubSpecialityResponse)
 async def create_sub_speciality(
     data: CreateSubSpeciality,
-    db: Session = Depends(get_db),
-    current_doctor: Doctor = Depends(get_current_doctor)
+    db: AsyncSession = Depends(get_async_db),
+    current_doctor: DoctorPrincipal = Depends(get_current_doctor)
 ):
     # Validate parent speciality exists
-    parent = db.query(MedicalSpeciality).filter(
+    parent = await db.scalar(select(MedicalSpeciality).where(
         MedicalSpeciality.id == data.speciality_id
-    ).first()
+    ))
     if not parent:
         raise HTTPException(status_code=400, detail="Invalid speciality_id")
 
@@ -106,8 +136,10 @@ async def create_sub_speciality(
         speciality_id=data.speciality_id
     )
     db.add(sub)
-    db.commit()
-    db.refresh(sub)
+    await bump_master_version(db)
+    await db.commit()
+    await db.refresh(sub)
+    get_master_cache().invalidate()
 
     return MedicalSubSpecialityResponse.model_validate(sub)
 
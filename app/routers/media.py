@@ -0,0 +1,30 @@
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import FileResponse
+from app.utils.etag import etag_matches, make_etag, not_modified
+from app.utils.media import media_path
+
+router = APIRouter(tags=["Media"])
+
+# Stored files are content-addressed, so a name never changes meaning
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+@router.get("/{name}")
+async def get_media(name: str, request: Request):
+    """Serve an uploaded photo or thumbnail, with ETag and Range support."""
+    path = media_path(name)
+    if path is None or not path.is_file():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found"
+        )
+
+    # The file name embeds the content hash, which makes it a strong validator
+    etag = make_etag(name.split(".")[0])
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    if etag_matches(request, etag):
+        return not_modified(headers)
+
+    # FileResponse streams with sendfile/pathsend when the server supports it
+    # and answers Range requests itself
+    return FileResponse(path, headers=headers)
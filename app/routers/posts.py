@@ -1,13 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from datetime import datetime, timezone
-from app.db import get_db
-from app.models.models import Doctor
+from app.db import get_async_db, get_async_read_db
 from app.models.social_account import SocialAccount
 from app.models.post import Post, PostStatus
 from app.schemas.social import PostCreate, PostUpdate, PostResponse
 from app.routers.auth import get_current_doctor
+from app.utils.export import export_response
+from app.utils.pagination import decode_cursor, encode_cursor
+from app.utils.principal import DoctorPrincipal
 import logging
 
 router = APIRouter(prefix="/posts", tags=["posts"])
@@ -17,15 +20,15 @@ logger = logging.getLogger(__name__)
 @router.post("/", response_model=PostResponse)
 async def create_scheduled_post(
     post_data: PostCreate,
-    current_doctor: Doctor = Depends(get_current_doctor),
-    db: Session = Depends(get_db)
+    current_doctor: DoctorPrincipal = Depends(get_current_doctor),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a scheduled post"""
     # Verify the social account belongs to the current doctor
-    social_account = db.query(SocialAccount).filter(
+    social_account = await db.scalar(select(SocialAccount).where(
         SocialAccount.id == post_data.social_account_id,
         SocialAccount.doctor_id == current_doctor.id
-    ).first()
+    ))
     
     if not social_account:
         raise HTTPException(
@@ -48,43 +51,119 @@ async def create_scheduled_post(
         content=post_data.content,
         media_url=post_data.media_url,
         scheduled_at=post_data.scheduled_at,
+        tolerance_minutes=post_data.tolerance_minutes,
         status=PostStatus.SCHEDULED
     )
     
     db.add(new_post)
-    db.commit()
-    db.refresh(new_post)
+    await db.commit()
+    await db.refresh(new_post)
     
     logger.info(f"Created scheduled post {new_post.id} for doctor {current_doctor.id} on {social_account.platform}")
     
     return new_post
 
 
+def post_filters(
+    doctor_id: int,
+    post_status: Optional[PostStatus],
+    platform: Optional[str],
+    scheduled_from: Optional[datetime],
+    scheduled_to: Optional[datetime]
+) -> list:
+    """WHERE clauses shared by the post list and export."""
+    filters = [Post.doctor_id == doctor_id]
+    if post_status is not None:
+        filters.append(Post.status == post_status)
+    if platform:
+        filters.append(Post.platform == platform)
+    if scheduled_from is not None:
+        filters.append(Post.scheduled_at >= scheduled_from)
+    if scheduled_to is not None:
+        filters.append(Post.scheduled_at < scheduled_to)
+    return filters
+
+
 @router.get("/", response_model=List[PostResponse])
 async def list_posts(
-    current_doctor: Doctor = Depends(get_current_doctor),
-    db: Session = Depends(get_db)
+    response: Response,
+    current_doctor: DoctorPrincipal = Depends(get_current_doctor),
+    db: AsyncSession = Depends(get_async_read_db),
+    post_status: Optional[PostStatus] = Query(None, alias="status", description="Only posts with this status"),
+    platform: Optional[str] = Query(None, description="Only posts for this platform"),
+    scheduled_from: Optional[datetime] = Query(None, description="Only posts scheduled at or after this time"),
+    scheduled_to: Optional[datetime] = Query(None, description="Only posts scheduled before this time"),
+    limit: int = Query(50, ge=1, le=500, description="Number of posts to return"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+    return_all: bool = Query(False, alias="all", description="Return every matching post in one response, ignoring limit and cursor")
 ):
-    """List all posts for the logged-in doctor"""
-    posts = db.query(Post).filter(
-        Post.doctor_id == current_doctor.id
-    ).order_by(Post.created_at.desc()).all()
-    
-    return posts
+    """
+    List the logged-in doctor's posts, newest first.
+
+    Keyset-paged over the (doctor_id, created_at, id) index; the cursor for
+    the next page is returned in the X-Next-Cursor header.
+    """
+    query = select(Post).where(
+        *post_filters(current_doctor.id, post_status, platform, scheduled_from, scheduled_to)
+    ).order_by(Post.created_at.desc(), Post.id.desc())
+    if return_all:
+        return (await db.scalars(query)).all()
+
+    after = decode_cursor(cursor, datetime.fromisoformat, int)
+    if after is not None:
+        created_at, post_id = after
+        # Compare against the stored timestamp of the cursor's post where it still
+        # exists, so the database's own timestamp format is used on both sides
+        anchor = select(Post.created_at).where(Post.id == post_id).scalar_subquery()
+        query = query.where(tuple_(Post.created_at, Post.id) < tuple_(func.coalesce(anchor, created_at), post_id))
+
+    posts = (await db.scalars(query.limit(limit + 1))).all()
+    page = posts[:limit]
+    if len(posts) > limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(page[-1].created_at, page[-1].id)
+    return page
+
+
+@router.get("/export")
+async def export_posts(
+    request: Request,
+    current_doctor: DoctorPrincipal = Depends(get_current_doctor),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    post_status: Optional[PostStatus] = Query(None, alias="status", description="Only posts with this status"),
+    platform: Optional[str] = Query(None, description="Only posts for this platform"),
+    scheduled_from: Optional[datetime] = Query(None, description="Only posts scheduled at or after this time"),
+    scheduled_to: Optional[datetime] = Query(None, description="Only posts scheduled before this time")
+):
+    """Download the logged-in doctor's posts as NDJSON or CSV, streamed and gzipped."""
+    query = select(
+        Post.id,
+        Post.social_account_id,
+        Post.platform,
+        Post.content,
+        Post.media_url,
+        Post.scheduled_at,
+        Post.tolerance_minutes,
+        Post.status,
+        Post.error_message,
+        Post.created_at,
+    ).where(
+        *post_filters(current_doctor.id, post_status, platform, scheduled_from, scheduled_to)
+    ).order_by(Post.id)
+    return export_response(request, query, format, "posts")
 
 
 @router.put("/{post_id}", response_model=PostResponse)
 async def update_post(
     post_id: int,
     post_update: PostUpdate,
-    current_doctor: Doctor = Depends(get_current_doctor),
-    db: Session = Depends(get_db)
+    current_doctor: DoctorPrincipal = Depends(get_current_doctor),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a scheduled post (only if status is SCHEDULED)"""
-    post = db.query(Post).filter(
+    post = await db.scalar(select(Post).where(
         Post.id == post_id,
         Post.doctor_id == current_doctor.id
-    ).first()
+    ))
     
     if not post:
         raise HTTPException(
@@ -112,8 +191,8 @@ async def update_post(
     for field, value in update_data.items():
         setattr(post, field, value)
     
-    db.commit()
-    db.refresh(post)
+    await db.commit()
+    await db.refresh(post)
     
     logger.info(f"Updated post {post_id} for doctor {current_doctor.id}")
     
@@ -123,14 +202,14 @@ async def update_post(
 @router.delete("/{post_id}")
 async def cancel_post(
     post_id: int,
-    current_doctor: Doctor = Depends(get_current_doctor),
-    db: Session = Depends(get_db)
+    current_doctor: DoctorPrincipal = Depends(get_current_doctor),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Cancel a scheduled post"""
-    post = db.query(Post).filter(
+    post = await db.scalar(select(Post).where(
         Post.id == post_id,
         Post.doctor_id == current_doctor.id
-    ).first()
+    ))
     
     if not post:
         raise HTTPException(
@@ -144,8 +223,8 @@ async def cancel_post(
             detail="Can only cancel scheduled posts"
         )
     
-    db.delete(post)
-    db.commit()
+    await db.delete(post)
+    await db.commit()
     
     logger.info(f"Cancelled post {post_id} for doctor {current_doctor.id}")
     
@@ -1,11 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.db import get_db
-from app.models.models import Doctor
+from app.db import get_async_db
 from app.models.social_account import SocialAccount
 from app.schemas.social import SocialAccountResponse, OAuthUrlResponse
 from app.routers.auth import get_current_doctor
+from app.utils.principal import DoctorPrincipal
 import logging
 
 router = APIRouter(prefix="/social", tags=["social"])
@@ -17,21 +18,21 @@ SUPPORTED_PLATFORMS = ["facebook", "instagram", "linkedin", "twitter", "youtube"
 
 @router.get("/accounts", response_model=List[SocialAccountResponse])
 async def list_social_accounts(
-    current_doctor: Doctor = Depends(get_current_doctor),
-    db: Session = Depends(get_db)
+    current_doctor: DoctorPrincipal = Depends(get_current_doctor),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all connected social accounts for the logged-in doctor"""
-    accounts = db.query(SocialAccount).filter(
+    accounts = (await db.scalars(select(SocialAccount).where(
         SocialAccount.doctor_id == current_doctor.id
-    ).all()
+    ))).all()
     return accounts
 
 
 @router.post("/connect/{platform}", response_model=OAuthUrlResponse)
 async def generate_oauth_url(
     platform: str,
-    current_doctor: Doctor = Depends(get_current_doctor),
-    db: Session = Depends(get_db)
+    current_doctor: DoctorPrincipal = Depends(get_current_doctor),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Generate OAuth authorization URL for the specified platform"""
     if platform not in SUPPORTED_PLATFORMS:
@@ -52,8 +53,8 @@ async def generate_oauth_url(
 async def oauth_callback(
     platform: str,
     code: str = Query(..., description="OAuth authorization code"),
-    current_doctor: Doctor = Depends(get_current_doctor),
-    db: Session = Depends(get_db)
+    current_doctor: DoctorPrincipal = Depends(get_current_doctor),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Handle OAuth2 callback and save access token"""
     if platform not in SUPPORTED_PLATFORMS:
@@ -63,10 +64,10 @@ async def oauth_callback(
         )
     
     # Check if account already exists
-    existing_account = db.query(SocialAccount).filter(
+    existing_account = await db.scalar(select(SocialAccount).where(
         SocialAccount.doctor_id == current_doctor.id,
         SocialAccount.platform == platform
-    ).first()
+    ))
     
     if existing_account:
         raise HTTPException(
@@ -87,8 +88,8 @@ async def oauth_callback(
     )
     
     db.add(new_account)
-    db.commit()
-    db.refresh(new_account)
+    await db.commit()
+    await db.refresh(new_account)
     
     logger.info(f"Connected {platform} account for doctor {current_doctor.id}")
     
@@ -98,14 +99,14 @@ async def oauth_callback(
 @router.delete("/accounts/{account_id}")
 async def disconnect_social_account(
     account_id: int,
-    current_doctor: Doctor = Depends(get_current_doctor),
-    db: Session = Depends(get_db)
+    current_doctor: DoctorPrincipal = Depends(get_current_doctor),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Disconnect a social media account"""
-    account = db.query(SocialAccount).filter(
+    account = await db.scalar(select(SocialAccount).where(
         SocialAccount.id == account_id,
         SocialAccount.doctor_id == current_doctor.id
-    ).first()
+    ))
     
     if not account:
         raise HTTPException(
@@ -115,10 +116,10 @@ async def disconnect_social_account(
     
     # Check if there are scheduled posts using this account
     from app.models.post import Post, PostStatus
-    scheduled_posts = db.query(Post).filter(
+    scheduled_posts = await db.scalar(select(func.count()).select_from(Post).where(
         Post.social_account_id == account_id,
         Post.status == PostStatus.SCHEDULED
-    ).count()
+    ))
     
     if scheduled_posts > 0:
         raise HTTPException(
@@ -127,8 +128,8 @@ async def disconnect_social_account(
         )
     
     platform = account.platform
-    db.delete(account)
-    db.commit()
+    await db.delete(account)
+    await db.commit()
     
     logger.info(f"Disconnected {platform} account {account_id} for doctor {current_doctor.id}")
     
@@ -0,0 +1,44 @@
+from pydantic import BaseModel, field_validator
+from typing import Optional, List
+from app.schemas.auth import DoctorRegisterRequest
+
+
+class IncompleteProfile(BaseModel):
+    id: int
+    full_name: str
+    email: str
+    profile_completeness: int
+    missing_fields: List[str]
+
+
+class IncompleteProfilesResponse(BaseModel):
+    doctors: List[IncompleteProfile]
+    next_cursor: Optional[str] = None
+
+
+class DoctorImportRow(DoctorRegisterRequest):
+    """One record of a bulk import; specialities may be given by name instead of id."""
+    password: Optional[str] = None
+    speciality: Optional[str] = None
+    sub_speciality: Optional[str] = None
+
+    @field_validator("password")
+    @classmethod
+    def reject_password(cls, value):
+        # Hashing would dominate the import; imported doctors sign in with Google
+        if value:
+            raise ValueError("passwords cannot be imported")
+        return None
+
+
+class DoctorImportError(BaseModel):
+    row: int  # 1-based record number, not counting the CSV header
+    email: Optional[str] = None
+    errors: List[str]
+
+
+class DoctorImportReport(BaseModel):
+    inserted: int
+    failed: int
+    errors: List[DoctorImportError]
+    errors_truncated: bool = False
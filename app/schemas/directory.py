@@ -0,0 +1,42 @@
+from pydantic import BaseModel
+from typing import Optional, List
+
+
+class DoctorSearchResult(BaseModel):
+    id: int
+    full_name: str
+    clinic_name: Optional[str] = None
+    qualification: Optional[str] = None
+    medical_institute: Optional[str] = None
+    speciality_id: Optional[int] = None
+    speciality_name: Optional[str] = None
+    sub_speciality_id: Optional[int] = None
+    sub_speciality_name: Optional[str] = None
+    profile_photo: Optional[str] = None
+    is_verified: Optional[str] = None
+    score: float
+
+
+class DoctorSearchResponse(BaseModel):
+    results: List[DoctorSearchResult]
+    next_cursor: Optional[str] = None
+
+
+class NearbyDoctor(BaseModel):
+    id: int
+    full_name: str
+    clinic_name: Optional[str] = None
+    clinic_address: Optional[str] = None
+    speciality_id: Optional[int] = None
+    speciality_name: Optional[str] = None
+    sub_speciality_id: Optional[int] = None
+    sub_speciality_name: Optional[str] = None
+    profile_photo: Optional[str] = None
+    latitude: float
+    longitude: float
+    distance_km: float
+
+
+class NearbyDoctorsResponse(BaseModel):
+    results: List[NearbyDoctor]
+    radius_km: float
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional, List
+from pydantic import BaseModel, EmailStr, Field, field_validator, model_validator
+from typing import Dict, Optional, List
 from datetime import datetime
 
 
@@ -18,6 +18,8 @@ class DoctorBase(BaseModel):
     medical_council_regd_no: Optional[str] = None
     profile_photo: Optional[str] = None
     professional_bio: Optional[str] = None
+    latitude: Optional[float] = None  # Clinic location
+    longitude: Optional[float] = None
 
 
 class DoctorCreate(DoctorBase):
@@ -38,6 +40,29 @@ class DoctorUpdate(BaseModel):
     medical_council_regd_no: Optional[str] = None
     profile_photo: Optional[str] = None
     professional_bio: Optional[str] = None
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
+
+    @field_validator("full_name")
+    @classmethod
+    def require_full_name(cls, value):
+        # Optional only in the sense that it may be left out; it cannot be cleared
+        if value is None:
+            raise ValueError("full_name cannot be null")
+        return value
+
+    @model_validator(mode="after")
+    def check_location_pair(self):
+        # A clinic location is set or cleared as a whole
+        fields = self.model_fields_set
+        if ("latitude" in fields or "longitude" in fields) and (self.latitude is None) != (self.longitude is None):
+            raise ValueError("latitude and longitude must be provided together")
+        return self
+
+
+class ProfilePhotoResponse(BaseModel):
+    profile_photo: str
+    thumbnails: Dict[int, str]  # Longest side in pixels -> URL
 
 
 class DoctorResponse(DoctorBase):
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Literal, Optional, List
 from datetime import datetime
 
 
@@ -50,6 +50,33 @@ class SubSpecialitiesListResponse(BaseModel):
     speciality_id: Optional[int] = None
 
 
+class SubSpecialityNode(BaseModel):
+    id: int
+    name: str
+
+
+class SpecialityNode(BaseModel):
+    id: int
+    name: str
+    sub_specialities: List[SubSpecialityNode]
+
+
+class MasterTreeResponse(BaseModel):
+    specialities: List[SpecialityNode]
+
+
+class AutocompleteMatch(BaseModel):
+    type: Literal["speciality", "sub_speciality"]
+    id: int
+    name: str
+    speciality_id: Optional[int] = None  # Parent of a sub-speciality
+    speciality_name: Optional[str] = None
+
+
+class AutocompleteResponse(BaseModel):
+    matches: List[AutocompleteMatch]
+
+
 
 class CreateSpeciality(BaseModel):
     name: str
@@ -1,6 +1,7 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional, List
 from datetime import datetime
+from app.config import settings
 from app.models.post import PostStatus
 
 
@@ -29,16 +30,37 @@ class PostBase(BaseModel):
     content: str
     media_url: Optional[str] = None
     scheduled_at: datetime
+    tolerance_minutes: Optional[int] = Field(
+        None, ge=0, description="Allow publishing up to this many minutes before or after scheduled_at"
+    )
+
+
+def _check_tolerance(value: Optional[int]) -> Optional[int]:
+    # Checked per request so importing the schemas does not load settings
+    if value is not None and value > settings.SCHEDULER_MAX_TOLERANCE_MINUTES:
+        raise ValueError(f"must be at most {settings.SCHEDULER_MAX_TOLERANCE_MINUTES} minutes")
+    return value
 
 
 class PostCreate(PostBase):
     social_account_id: int
 
+    @field_validator("tolerance_minutes")
+    @classmethod
+    def validate_tolerance(cls, value):
+        return _check_tolerance(value)
+
 
 class PostUpdate(BaseModel):
     content: Optional[str] = None
     media_url: Optional[str] = None
     scheduled_at: Optional[datetime] = None
+    tolerance_minutes: Optional[int] = Field(None, ge=0)
+
+    @field_validator("tolerance_minutes")
+    @classmethod
+    def validate_tolerance(cls, value):
+        return _check_tolerance(value)
 
 
 class PostResponse(PostBase):
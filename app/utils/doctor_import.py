@@ -0,0 +1,244 @@
+import codecs
+import csv
+import json
+from typing import AsyncIterator, Optional, Union
+from pydantic import ValidationError
+from sqlalchemy import column, literal, select, table, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.db import dialect_insert
+from app.models.models import Doctor, VerificationStatus
+from app.schemas.admin import DoctorImportError, DoctorImportReport, DoctorImportRow
+from app.utils.master_cache import MasterSnapshot
+from app.utils.profile import missing_fields_mask
+
+# Doctor columns written by an import, in COPY order
+IMPORT_COLUMNS = [
+    "full_name", "email", "phone_number", "clinic_name", "clinic_address",
+    "speciality_id", "sub_speciality_id", "years_of_experience", "qualification",
+    "medical_institute", "awards", "medical_council_regd_no", "profile_photo",
+    "professional_bio", "profile_tips_mask",
+]
+COLUMN_LENGTHS = {
+    name: Doctor.__table__.c[name].type.length
+    for name in IMPORT_COLUMNS
+    if getattr(Doctor.__table__.c[name].type, "length", None)
+}
+
+# A record is either a parsed mapping or the reason it could not be parsed
+Record = tuple[int, Union[dict, str]]
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a byte stream into lines without holding more than one chunk."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        lines = pending.split("\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+async def iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[Record]:
+    """CSV records keyed by the header row; quoted fields may span lines."""
+    header = None
+    row = 0
+    buffer = []
+    async for line in lines:
+        buffer.append(line)
+        # An odd number of quotes means a quoted field continues on the next line
+        if sum(part.count('"') for part in buffer) % 2:
+            continue
+        values = next(csv.reader(["\n".join(buffer)]), [])
+        buffer = []
+        if not any(value.strip() for value in values):
+            continue
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        row += 1
+        if len(values) != len(header):
+            yield row, f"expected {len(header)} columns, got {len(values)}"
+        else:
+            yield row, dict(zip(header, values))
+    if buffer:
+        yield row + 1, "unterminated quoted field"
+
+
+async def iter_ndjson_records(lines: AsyncIterator[str]) -> AsyncIterator[Record]:
+    row = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        row += 1
+        try:
+            value = json.loads(line)
+        except ValueError as e:
+            yield row, f"invalid JSON: {e}"
+            continue
+        yield row, value if isinstance(value, dict) else "expected a JSON object"
+
+
+class SpecialityResolver:
+    """Maps speciality and sub-speciality names to ids using the master data snapshot."""
+
+    def __init__(self, snapshot: MasterSnapshot):
+        self.snapshot = snapshot
+        self.specialities = {name.casefold(): id for id, name in snapshot.specialities.items()}
+        self.sub_specialities: dict[str, list[tuple[int, int]]] = {}
+        for id, (speciality_id, name) in snapshot.sub_specialities.items():
+            self.sub_specialities.setdefault(name.casefold(), []).append((speciality_id, id))
+
+    def resolve(self, row: DoctorImportRow) -> tuple[Optional[int], Optional[int], list[str]]:
+        speciality_id, sub_speciality_id = row.speciality_id, row.sub_speciality_id
+        if row.speciality:
+            speciality_id = self.specialities.get(row.speciality.casefold())
+            if speciality_id is None:
+                return None, None, [f"unknown speciality '{row.speciality}'"]
+        elif speciality_id and speciality_id not in self.snapshot.specialities:
+            return None, None, ["invalid speciality_id"]
+
+        if row.sub_speciality:
+            candidates = [
+                (parent, id) for parent, id in self.sub_specialities.get(row.sub_speciality.casefold(), [])
+                if not speciality_id or parent == speciality_id
+            ]
+            if len(candidates) != 1:
+                reason = "unknown" if not candidates else "ambiguous"
+                return None, None, [f"{reason} sub-speciality '{row.sub_speciality}'"]
+            parent, sub_speciality_id = candidates[0]
+            speciality_id = speciality_id or parent
+        elif sub_speciality_id:
+            entry = self.snapshot.sub_specialities.get(sub_speciality_id)
+            if entry is None:
+                return None, None, ["invalid sub_speciality_id"]
+            if speciality_id and entry[0] != speciality_id:
+                return None, None, ["sub-speciality does not belong to the selected speciality"]
+        return speciality_id, sub_speciality_id, []
+
+
+def _clean(record: dict) -> dict:
+    # Blank cells are missing values, as in the registration form
+    return {
+        key: (value.strip() or None) if isinstance(value, str) else value
+        for key, value in record.items()
+        if key
+    }
+
+
+def _validation_messages(error: ValidationError) -> list[str]:
+    return [
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}" if item["loc"] else item["msg"]
+        for item in error.errors(include_url=False)
+    ]
+
+
+async def _insert_postgres(db: AsyncSession, rows: list[dict]) -> set[str]:
+    """COPY the chunk into a temp table, then move it over skipping conflicts."""
+    await db.execute(text(
+        f"CREATE TEMP TABLE doctor_import ON COMMIT DROP AS "
+        f"SELECT {', '.join(IMPORT_COLUMNS)} FROM doctors WITH NO DATA"
+    ))
+    raw = await (await db.connection()).get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(
+        "doctor_import",
+        records=[tuple(row[name] for name in IMPORT_COLUMNS) for row in rows],
+        columns=IMPORT_COLUMNS,
+    )
+    staged = table("doctor_import", *(column(name) for name in IMPORT_COLUMNS))
+    stmt = dialect_insert(db, Doctor).from_select(
+        [*IMPORT_COLUMNS, "is_verified"],
+        select(*staged.c, literal(VerificationStatus.PENDING, Doctor.is_verified.type))
+    ).on_conflict_do_nothing().returning(Doctor.email)
+    return set((await db.scalars(stmt)).all())
+
+
+async def _insert_executemany(db: AsyncSession, rows: list[dict]) -> set[str]:
+    stmt = dialect_insert(db, Doctor).on_conflict_do_nothing().returning(Doctor.email)
+    params = [{**row, "is_verified": VerificationStatus.PENDING} for row in rows]
+    return set((await db.scalars(stmt, params)).all())
+
+
+async def import_doctors(
+    db: AsyncSession,
+    records: AsyncIterator[Record],
+    snapshot: MasterSnapshot
+) -> DoctorImportReport:
+    """
+    Validate and insert doctors chunk by chunk, committing each chunk.
+
+    Rows whose email or registration number already exists are reported,
+    not updated. Only one chunk of rows is held in memory at a time.
+    """
+    resolver = SpecialityResolver(snapshot)
+    insert_chunk = _insert_postgres if db.get_bind().dialect.name == "postgresql" else _insert_executemany
+    report = DoctorImportReport(inserted=0, failed=0, errors=[])
+
+    def fail(row: int, email: Optional[str], errors: list[str]):
+        report.failed += 1
+        if len(report.errors) < settings.IMPORT_MAX_ERRORS:
+            report.errors.append(DoctorImportError(row=row, email=email, errors=errors))
+        else:
+            report.errors_truncated = True
+
+    chunk: list[dict] = []
+    chunk_rows: list[int] = []
+    seen: set[str] = set()
+
+    async def flush():
+        inserted = await insert_chunk(db, chunk)
+        await db.commit()
+        report.inserted += len(inserted)
+        for row, values in zip(chunk_rows, chunk):
+            if values["email"] not in inserted:
+                fail(row, values["email"], ["email or medical council registration number already registered"])
+        chunk.clear()
+        chunk_rows.clear()
+        seen.clear()
+
+    async for row, record in records:
+        if isinstance(record, str):
+            fail(row, None, [record])
+            continue
+        record = _clean(record)
+        try:
+            doctor = DoctorImportRow.model_validate(record)
+        except ValidationError as e:
+            email = record.get("email")
+            fail(row, email if isinstance(email, str) else None, _validation_messages(e))
+            continue
+
+        speciality_id, sub_speciality_id, errors = resolver.resolve(doctor)
+        values = doctor.model_dump(include=set(IMPORT_COLUMNS))
+        values.update(speciality_id=speciality_id, sub_speciality_id=sub_speciality_id)
+        errors += [
+            f"{name}: at most {length} characters"
+            for name, length in COLUMN_LENGTHS.items()
+            if values.get(name) and len(values[name]) > length
+        ]
+        # Duplicates inside a chunk would be indistinguishable in the RETURNING set
+        keys = [f"email:{doctor.email}"]
+        if doctor.medical_council_regd_no:
+            keys.append(f"regd:{doctor.medical_council_regd_no}")
+        if not errors and any(key in seen for key in keys):
+            errors.append("duplicate email or medical council registration number in upload")
+        if errors:
+            fail(row, doctor.email, errors)
+            continue
+
+        seen.update(keys)
+        values["profile_tips_mask"] = missing_fields_mask(values)
+        chunk.append(values)
+        chunk_rows.append(row)
+        if len(chunk) >= settings.IMPORT_CHUNK_SIZE:
+            await flush()
+
+    if chunk:
+        await flush()
+    report.errors.sort(key=lambda error: error.row)
+    return report
@@ -0,0 +1,196 @@
+import asyncio
+import logging
+import smtplib
+import time
+from collections import deque
+from dataclasses import dataclass
+from email.message import EmailMessage
+from functools import lru_cache
+from typing import Optional
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueuedEmail:
+    message: EmailMessage
+    enqueued_at: float
+
+
+class EmailQueue:
+    """
+    Background email delivery.
+
+    Callers enqueue and return immediately; workers drain the queue in
+    batches, each over its own SMTP connection that stays open between
+    batches and is reopened when the server drops it.
+    """
+
+    def __init__(self, maxsize: int, batch_size: int, batch_interval: float, workers: int):
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.workers = workers
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self.batches = 0
+        self._latencies: deque[float] = deque(maxlen=1000)
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: list[asyncio.Task] = []
+        self._connections: list[Optional[smtplib.SMTP]] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self):
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._connections = [None] * self.workers
+        self._tasks = [asyncio.create_task(self._worker(slot)) for slot in range(self.workers)]
+        logger.info(f"Email queue started with {self.workers} workers")
+
+    async def stop(self, timeout: float = 10):
+        """Flush pending messages (up to timeout), then stop workers and close connections."""
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Email queue stopped with {self._queue.qsize()} undelivered messages")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for slot in range(len(self._connections)):
+            await asyncio.to_thread(self._close, slot)
+
+    def enqueue(self, message: EmailMessage) -> bool:
+        """Queue a message for delivery; False when the queue is not running or full."""
+        if not self.running:
+            return False
+        try:
+            self._queue.put_nowait(QueuedEmail(message, time.monotonic()))
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.warning(f"Email queue full, dropping message to {message['To']}")
+            return False
+
+    async def _next_batch(self) -> list[QueuedEmail]:
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.batch_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _worker(self, slot: int):
+        while True:
+            batch = await self._next_batch()
+            try:
+                await asyncio.to_thread(self._deliver, slot, batch)
+            finally:
+                self.batches += 1
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _connect(self) -> smtplib.SMTP:
+        connection = smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=settings.SMTP_TIMEOUT_SECONDS)
+        if settings.SMTP_USE_TLS:
+            connection.starttls()
+        if settings.SMTP_USERNAME:
+            connection.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD or "")
+        return connection
+
+    def _close(self, slot: int):
+        connection = self._connections[slot]
+        self._connections[slot] = None
+        if connection is not None:
+            try:
+                connection.quit()
+            except smtplib.SMTPException:
+                connection.close()
+
+    def _send(self, slot: int, message: EmailMessage):
+        for attempt in range(2):
+            if self._connections[slot] is None:
+                self._connections[slot] = self._connect()
+            try:
+                self._connections[slot].send_message(message)
+                return
+            except (smtplib.SMTPServerDisconnected, OSError):
+                # Idle connection dropped by the server; reconnect once
+                self._connections[slot] = None
+                if attempt:
+                    raise
+
+    def _deliver(self, slot: int, batch: list[QueuedEmail]):
+        """Send a batch over this worker's connection (runs in a thread)."""
+        for item in batch:
+            try:
+                self._send(slot, item.message)
+            except (smtplib.SMTPException, OSError) as e:
+                logger.error(f"Email to {item.message['To']} failed: {e}")
+                self.failed += 1
+                continue
+            self.sent += 1
+            self._latencies.append(time.monotonic() - item.enqueued_at)
+
+    def stats(self) -> dict:
+        latencies = sorted(self._latencies)
+
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1)
+
+        return {
+            "running": self.running,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "sent": self.sent,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "latency_ms": {"p50": percentile(0.5), "p95": percentile(0.95), "max": percentile(1)},
+        }
+
+
+@lru_cache
+def get_email_queue() -> EmailQueue:
+    return EmailQueue(
+        maxsize=settings.EMAIL_QUEUE_SIZE,
+        batch_size=settings.EMAIL_BATCH_SIZE,
+        batch_interval=settings.EMAIL_BATCH_INTERVAL_SECONDS,
+        workers=settings.EMAIL_WORKERS,
+    )
+
+
+def start_email_queue():
+    """Start delivery workers when SMTP is configured."""
+    if settings.SMTP_HOST:
+        get_email_queue().start()
+    else:
+        logger.info("SMTP_HOST not set, emails will be logged instead of sent")
+
+
+async def stop_email_queue():
+    await get_email_queue().stop()
+
+
+def send_email(to: str, subject: str, body: str) -> bool:
+    """Enqueue a plain-text email; returns False if it could not be queued."""
+    message = EmailMessage()
+    message["From"] = settings.EMAIL_FROM
+    message["To"] = to
+    message["Subject"] = subject
+    message.set_content(body)
+    return get_email_queue().enqueue(message)
@@ -0,0 +1,30 @@
+from datetime import datetime
+from typing import Optional
+from fastapi import Request, Response, status
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag built from version markers such as ids, counters or timestamps."""
+    return '"' + "-".join(str(part) for part in parts) + '"'
+
+
+def timestamp_marker(*candidates: Optional[datetime]) -> int:
+    """Microsecond timestamp of the first non-empty candidate (e.g. updated_at, created_at)."""
+    for value in candidates:
+        if value is not None:
+            return int(value.timestamp() * 1_000_000)
+    return 0
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether If-None-Match names etag; compared weakly, as RFC 9110 requires for this header."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def not_modified(headers: dict[str, str]) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
@@ -0,0 +1,84 @@
+import csv
+import enum
+import io
+import json
+import zlib
+from datetime import date, datetime
+from typing import Any, AsyncIterator
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+from app.config import settings
+from app.db import AsyncReadSessionLocal
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _encode_ndjson(columns: list[str], rows) -> str:
+    return "".join(
+        json.dumps({name: _plain(value) for name, value in zip(columns, row)}, ensure_ascii=False) + "\n"
+        for row in rows
+    )
+
+
+def _encode_csv(columns: list[str], rows) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows([_plain(value) for value in row] for row in rows)
+    return buffer.getvalue()
+
+
+async def export_rows(query: Select, format: str, compress: bool) -> AsyncIterator[bytes]:
+    """
+    Encode the rows of query batch by batch, optionally gzipped.
+
+    Rows come from a server-side cursor (yield_per), so memory holds one batch
+    however many rows match. The generator opens its own read session because
+    it keeps running after the endpoint has returned.
+    """
+    columns = [column.name for column in query.selected_columns]
+    encode = _encode_csv if format == "csv" else _encode_ndjson
+    compressor = zlib.compressobj(settings.EXPORT_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if compress else None
+
+    def output(text: str) -> bytes:
+        data = text.encode()
+        return compressor.compress(data) if compressor else data
+
+    if format == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(columns)
+        yield output(buffer.getvalue())
+
+    async with AsyncReadSessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=settings.EXPORT_BATCH_SIZE))
+        async for rows in result.partitions():
+            chunk = output(encode(columns, rows))
+            # Small batches may still be buffered inside the compressor
+            if chunk:
+                yield chunk
+
+    if compressor:
+        yield compressor.flush()
+
+
+def export_response(request: Request, query: Select, format: str, filename: str) -> StreamingResponse:
+    """Stream query as an NDJSON or CSV download, gzipped when the client accepts it."""
+    compress = "gzip" in request.headers.get("accept-encoding", "").lower()
+    headers = {
+        "Content-Disposition": f'attachment; filename="{filename}.{format}"',
+        "Vary": "Accept-Encoding",
+    }
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        export_rows(query, format, compress),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers=headers
+    )
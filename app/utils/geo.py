@@ -0,0 +1,128 @@
+import math
+from typing import Optional
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.models import Doctor
+
+# Doctors are bucketed into a fixed lat/lon grid stored in doctors.geo_cell.
+# Changing the cell size means recomputing geo_cell for every row.
+CELL_DEGREES = 0.1
+ROWS = round(180 / CELL_DEGREES)
+COLUMNS = round(360 / CELL_DEGREES)
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE_LAT = 111.32
+
+
+def _row(latitude: float) -> int:
+    return min(ROWS - 1, max(0, math.floor((latitude + 90) / CELL_DEGREES)))
+
+
+def _column(longitude: float) -> int:
+    return math.floor(((longitude + 180) % 360) / CELL_DEGREES) % COLUMNS
+
+
+def geo_cell(latitude: Optional[float], longitude: Optional[float]) -> Optional[int]:
+    """Grid cell id for a location (cells are numbered row by row)."""
+    if latitude is None or longitude is None:
+        return None
+    return _row(latitude) * COLUMNS + _column(longitude)
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def bounding_box(latitude: float, longitude: float, radius_km: float) -> tuple[float, float, list[tuple[float, float]]]:
+    """
+    (min_lat, max_lat, longitude ranges) enclosing a circle.
+
+    The longitude span is split in two where it crosses the antimeridian and
+    covers every longitude when the circle reaches a pole.
+    """
+    lat_delta = radius_km / KM_PER_DEGREE_LAT
+    # Widest longitude span is at the bounding box edge nearest a pole
+    widest = min(89.9, abs(latitude) + lat_delta)
+    lon_delta = radius_km / (KM_PER_DEGREE_LAT * math.cos(math.radians(widest)))
+    if lon_delta >= 180:
+        longitudes = [(-180.0, 180.0)]
+    else:
+        west = (longitude - lon_delta + 180) % 360 - 180
+        east = (longitude + lon_delta + 180) % 360 - 180
+        longitudes = [(west, east)] if west <= east else [(west, 180.0), (-180.0, east)]
+    return latitude - lat_delta, latitude + lat_delta, longitudes
+
+
+def cell_ranges(latitude: float, longitude: float, radius_km: float) -> list[tuple[int, int]]:
+    """
+    Inclusive geo_cell ranges covering a circle's bounding box.
+
+    Cells in one grid row are contiguous, so each row is a single index
+    range scan; rows that cross the antimeridian are split in two.
+    """
+    min_lat, max_lat, longitudes = bounding_box(latitude, longitude, radius_km)
+    columns = [(_column(west), _column(east) if east < 180 else COLUMNS - 1) for west, east in longitudes]
+    return [
+        (row * COLUMNS + start, row * COLUMNS + end)
+        for row in range(_row(min_lat), _row(max_lat) + 1)
+        for start, end in columns
+    ]
+
+
+def in_bounding_box(latitude: float, longitude: float, radius_km: float):
+    """SQL condition keeping only doctors inside a circle's bounding box."""
+    min_lat, max_lat, longitudes = bounding_box(latitude, longitude, radius_km)
+    return and_(
+        Doctor.latitude.between(min_lat, max_lat),
+        or_(*(Doctor.longitude.between(west, east) for west, east in longitudes))
+    )
+
+
+async def nearby_doctors(
+    db: AsyncSession,
+    latitude: float,
+    longitude: float,
+    radius_km: float,
+    limit: int,
+    filters: list
+) -> list[tuple[float, object]]:
+    """
+    Up to limit (distance_km, row) pairs within radius_km, nearest first.
+
+    Searches a small circle first and widens it only until enough doctors
+    are found, so dense areas touch few cells and sparse areas still fill
+    the page. The geo_cell ranges pick the index ranges to scan; the
+    bounding box, checked against the index's latitude and longitude
+    columns, drops most rows of those cells before any is fetched.
+    """
+    search_radius = min(radius_km, 2.0)
+    while True:
+        ranges = cell_ranges(latitude, longitude, search_radius)
+        rows = (await db.execute(
+            select(
+                Doctor.id,
+                Doctor.full_name,
+                Doctor.clinic_name,
+                Doctor.clinic_address,
+                Doctor.speciality_id,
+                Doctor.sub_speciality_id,
+                Doctor.profile_photo,
+                Doctor.latitude,
+                Doctor.longitude,
+            ).where(
+                or_(*(Doctor.geo_cell.between(start, end) for start, end in ranges)),
+                in_bounding_box(latitude, longitude, search_radius),
+                *filters
+            )
+        )).all()
+
+        found = []
+        for row in rows:
+            distance = haversine_km(latitude, longitude, row.latitude, row.longitude)
+            if distance <= search_radius:
+                found.append((distance, row))
+        if len(found) >= limit or search_radius >= radius_km:
+            found.sort(key=lambda item: (item[0], item[1].id))
+            return found[:limit]
+        search_radius = min(radius_km, search_radius * 4)
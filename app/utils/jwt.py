@@ -1,20 +1,11 @@
+import hashlib
+import time
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from app.config import settings
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash."""
-    return pwd_context.verify(plain_password, hashed_password)
-
-
-def get_password_hash(password: str) -> str:
-    """Hash a password."""
-    return pwd_context.hash(password)
+from app.utils.cache import TTLCache
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -30,13 +21,42 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
+@lru_cache
+def get_claims_cache() -> TTLCache:
+    """Verified claims keyed by token digest, shared by every token-checking code path."""
+    return TTLCache(maxsize=settings.JWT_CLAIMS_CACHE_SIZE, ttl=settings.JWT_CLAIMS_CACHE_TTL_SECONDS)
+
+
+def decode_token(token: str, secret_key: str, algorithm: str) -> dict:
+    """
+    Verify and decode a JWT, reusing the claims of tokens verified before.
+
+    The digest covers the signing key and algorithm as well as the token, so a
+    token verified under one key is never served to a caller using another.
+    Entries never outlive the token's exp. Raises JWTError like jwt.decode.
+    """
+    digest = hashlib.sha256(f"{algorithm}\0{secret_key}\0{token}".encode()).digest()
+    cache = get_claims_cache()
+    claims = cache.get(digest)
+    if claims is not None:
+        return dict(claims)
+
+    claims = jwt.decode(token, secret_key, algorithms=[algorithm])
+    exp = claims.get("exp")
+    ttl = exp - time.time() if isinstance(exp, (int, float)) else None
+    cache.set(digest, claims, ttl=ttl)
+    return dict(claims)
+
+
 def verify_token(token: str) -> Optional[dict]:
-    """Verify and decode a JWT token."""
+    """Verify and decode a JWT access token; refresh tokens are rejected."""
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
+        payload = decode_token(token, settings.SECRET_KEY, settings.ALGORITHM)
     except JWTError:
         return None
+    if payload.get("type") == "refresh":
+        return None
+    return payload
 
 
 def get_current_user_id(token: str) -> Optional[int]:
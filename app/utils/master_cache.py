@@ -0,0 +1,200 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from app.config import settings
+from app.db import AsyncSessionLocal, dialect_insert
+from app.models.cache_version import CacheVersion
+from app.models.models import MedicalSpeciality
+from app.utils.trie import PrefixTrie
+from app.schemas.master import (
+    MasterTreeResponse, MedicalSpecialityResponse, MedicalSubSpecialityResponse,
+    SpecialitiesListResponse, SpecialityNode, SubSpecialitiesListResponse, SubSpecialityNode
+)
+
+logger = logging.getLogger(__name__)
+
+# cache_versions row bumped by every write to the master tables
+MASTER_VERSION_NAME = "master"
+# Serialized list responses kept per snapshot, keyed by query parameters
+MAX_CACHED_RESPONSES = 256
+AUTOCOMPLETE_MAX_RESULTS = 10
+
+
+@dataclass(frozen=True)
+class MasterSnapshot:
+    """Id-to-name maps for specialities and sub-specialities, plus the rows the list endpoints return."""
+    specialities: dict[int, str] = field(default_factory=dict)
+    sub_specialities: dict[int, tuple[int, str]] = field(default_factory=dict)  # id -> (speciality_id, name)
+    loaded_at: float = 0.0
+    version: int = 0  # cache_versions.version when loaded; also the master-data ETag
+    speciality_rows: list[MedicalSpecialityResponse] = field(default_factory=list)
+    sub_speciality_rows: list[MedicalSubSpecialityResponse] = field(default_factory=list)
+    tree: Optional[MasterTreeResponse] = None
+    _responses: dict[tuple, bytes] = field(default_factory=dict, repr=False, compare=False)
+
+    def speciality_name(self, speciality_id: Optional[int]) -> Optional[str]:
+        return self.specialities.get(speciality_id)
+
+    def sub_speciality_name(self, sub_speciality_id: Optional[int]) -> Optional[str]:
+        entry = self.sub_specialities.get(sub_speciality_id)
+        return entry[1] if entry else None
+
+    def _memoize(self, key: tuple, build) -> bytes:
+        body = self._responses.get(key)
+        if body is None:
+            body = build().model_dump_json().encode()
+            if len(self._responses) < MAX_CACHED_RESPONSES:
+                self._responses[key] = body
+        return body
+
+    def specialities_json(self, skip: int, limit: int) -> bytes:
+        """Serialized GET /master/specialities page."""
+        return self._memoize(("specialities", skip, limit), lambda: SpecialitiesListResponse(
+            specialities=self.speciality_rows[skip:skip + limit],
+            total=len(self.speciality_rows)
+        ))
+
+    def sub_specialities_json(self, speciality_id: Optional[int], skip: int, limit: int) -> bytes:
+        """Serialized GET /master/sub-specialities page."""
+        def build():
+            rows = self.sub_speciality_rows
+            if speciality_id:
+                rows = [row for row in rows if row.speciality_id == speciality_id]
+            return SubSpecialitiesListResponse(
+                sub_specialities=rows[skip:skip + limit],
+                total=len(rows),
+                speciality_id=speciality_id
+            )
+        return self._memoize(("sub_specialities", speciality_id, skip, limit), build)
+
+    def tree_json(self) -> bytes:
+        """Serialized GET /master/tree."""
+        return self._memoize(("tree",), lambda: self.tree or MasterTreeResponse(specialities=[]))
+
+
+async def read_master_version(db: AsyncSession) -> int:
+    return await db.scalar(select(CacheVersion.version).where(CacheVersion.name == MASTER_VERSION_NAME)) or 0
+
+
+async def bump_master_version(db: AsyncSession):
+    """Mark the master data as changed; call in the same transaction as the write."""
+    stmt = dialect_insert(db, CacheVersion).values(name=MASTER_VERSION_NAME, version=1)
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[CacheVersion.name],
+        set_={"version": CacheVersion.version + 1}
+    ))
+
+
+class MasterDataCache:
+    """
+    Per-process copy of the rarely changing master tables.
+
+    Reloaded when the cache_versions row moves (checked by the scheduler),
+    after MASTER_CACHE_TTL_SECONDS, on invalidate() after local writes, or on
+    demand when a caller sees an id it does not know yet. The autocomplete
+    trie outlives snapshots and only has new names added on reload.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._snapshot: Optional[MasterSnapshot] = None
+        self._lock = asyncio.Lock()
+        self._trie = PrefixTrie(max_results=AUTOCOMPLETE_MAX_RESULTS)
+        self._indexed: dict[tuple[str, int], str] = {}
+
+    def invalidate(self):
+        self._snapshot = None
+
+    def check_version(self, version: int):
+        """Drop the snapshot if another worker has changed the master data since it was loaded."""
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version != version:
+            self.invalidate()
+
+    async def get(self, db: AsyncSession, refresh: bool = False) -> MasterSnapshot:
+        snapshot = self._snapshot
+        if not refresh and snapshot is not None and time.monotonic() - snapshot.loaded_at < self.ttl:
+            return snapshot
+        async with self._lock:
+            # Another request may have reloaded while we waited
+            if self._snapshot is not None and self._snapshot is not snapshot:
+                return self._snapshot
+            self._snapshot = await self._load(db)
+            self._index(self._snapshot)
+            return self._snapshot
+
+    def _index(self, snapshot: MasterSnapshot):
+        names = {("speciality", id): name for id, name in snapshot.specialities.items()}
+        names.update({("sub_speciality", id): name for id, (_, name) in snapshot.sub_specialities.items()})
+        if any(names.get(key) != name for key, name in self._indexed.items()):
+            # Something was renamed or removed, which the trie cannot undo
+            self._trie = PrefixTrie(max_results=AUTOCOMPLETE_MAX_RESULTS)
+            self._indexed = {}
+        for key, name in names.items():
+            if key not in self._indexed:
+                self._trie.insert(key, name)
+                self._indexed[key] = name
+
+    def autocomplete(self, prefix: str, limit: int) -> list[tuple[str, int]]:
+        """("speciality" | "sub_speciality", id) pairs best matching prefix, as of the last load."""
+        return self._trie.search(prefix, limit)
+
+    async def _load(self, db: AsyncSession) -> MasterSnapshot:
+        # Version first: a write landing during the load then triggers another reload
+        version = await read_master_version(db)
+        # Specialities plus one IN query for all their sub-specialities
+        specialities = (await db.scalars(
+            select(MedicalSpeciality)
+            .options(selectinload(MedicalSpeciality.sub_specialities))
+            .order_by(MedicalSpeciality.id)
+        )).all()
+
+        nodes = []
+        sub_speciality_rows = []
+        for speciality in specialities:
+            children = sorted(speciality.sub_specialities, key=lambda sub_speciality: sub_speciality.id)
+            nodes.append(SpecialityNode(
+                id=speciality.id,
+                name=speciality.name,
+                sub_specialities=[SubSpecialityNode(id=child.id, name=child.name) for child in children]
+            ))
+            for child in children:
+                row = MedicalSubSpecialityResponse.model_validate(child)
+                row.speciality_name = speciality.name
+                sub_speciality_rows.append(row)
+        sub_speciality_rows.sort(key=lambda row: row.id)
+
+        snapshot = MasterSnapshot(
+            specialities={speciality.id: speciality.name for speciality in specialities},
+            sub_specialities={row.id: (row.speciality_id, row.name) for row in sub_speciality_rows},
+            loaded_at=time.monotonic(),
+            version=version,
+            speciality_rows=[MedicalSpecialityResponse.model_validate(speciality) for speciality in specialities],
+            sub_speciality_rows=sub_speciality_rows,
+            tree=MasterTreeResponse(specialities=nodes),
+        )
+        # Serialize the tree and default pages up front so the first readers do no work
+        snapshot.tree_json()
+        snapshot.specialities_json(0, 100)
+        snapshot.sub_specialities_json(None, 0, 100)
+        return snapshot
+
+
+@lru_cache
+def get_master_cache() -> MasterDataCache:
+    return MasterDataCache(ttl=settings.MASTER_CACHE_TTL_SECONDS)
+
+
+async def sync_master_cache():
+    """Invalidate this worker's snapshot when the master version has moved (run by the scheduler)."""
+    try:
+        async with AsyncSessionLocal() as db:
+            get_master_cache().check_version(await read_master_version(db))
+    except Exception as e:
+        logger.error(f"Error checking master data version: {str(e)}")
@@ -0,0 +1,244 @@
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+from fastapi import HTTPException, Request, status
+from python_multipart.multipart import MultipartParseError, MultipartParser, parse_options_header
+from app.config import settings
+
+IMAGE_FORMATS = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp"}
+PHOTO_FIELD = "photo"
+# Allowance for boundaries, part headers and small fields around the photo
+MULTIPART_OVERHEAD = 64 * 1024
+
+# <sha256>.<ext> for originals, <sha256>_<size>.jpg for thumbnails
+MEDIA_NAME = re.compile(r"^[0-9a-f]{64}(_\d+)?\.(jpg|png|webp)$")
+
+
+@lru_cache
+def _get_executor() -> ThreadPoolExecutor:
+    # Pillow releases the GIL while decoding and resizing
+    return ThreadPoolExecutor(max_workers=settings.MEDIA_WORKERS, thread_name_prefix="media")
+
+
+def media_root() -> Path:
+    return Path(settings.MEDIA_ROOT)
+
+
+def media_path(name: str) -> Optional[Path]:
+    """Location of a stored file, or None if the name is not one we produce."""
+    if not MEDIA_NAME.match(name):
+        return None
+    return media_root() / name[:2] / name
+
+
+def media_url(name: str) -> str:
+    return f"{settings.MEDIA_URL_PREFIX}/{name}"
+
+
+def thumbnail_name(digest: str, size: int) -> str:
+    return f"{digest}_{size}.jpg"
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Photo must be at most {max_bytes // (1024 * 1024)} MB"
+    )
+
+
+class _Spool:
+    """Temp file under MEDIA_ROOT/tmp that hashes everything written to it."""
+
+    def __init__(self):
+        tmp_dir = media_root() / "tmp"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(dir=tmp_dir)
+        self.file = os.fdopen(fd, "wb")
+        self.digest = hashlib.sha256()
+
+    def write(self, chunks: list[bytes]):
+        for chunk in chunks:
+            self.digest.update(chunk)
+            self.file.write(chunk)
+
+    def close(self):
+        self.file.close()
+
+    def discard(self):
+        self.file.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+async def receive_photo(request: Request, max_bytes: int) -> tuple[str, str]:
+    """
+    Stream the photo field of a multipart request body to a temp file.
+
+    The body is parsed as it arrives and only the photo part is written, in
+    the media worker pool, so neither the event loop nor memory ever holds
+    the whole upload. Oversized uploads are rejected from Content-Length
+    when it is sent, otherwise as soon as the running count passes the limit.
+    Returns the temp file path and the SHA-256 of its content.
+    """
+    body_limit = max_bytes + MULTIPART_OVERHEAD
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > body_limit:
+        raise _too_large(max_bytes)
+
+    content_type, options = parse_options_header(request.headers.get("content-type"))
+    boundary = options.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Send the photo as multipart/form-data in a '{PHOTO_FIELD}' field"
+        )
+
+    part = {"field": b"", "value": b"", "headers": {}, "photo": False}
+    photo = {"found": False, "size": 0, "pending": []}
+
+    def on_part_begin():
+        part.update(field=b"", value=b"", headers={}, photo=False)
+
+    def on_header_field(data: bytes, start: int, end: int):
+        part["field"] += data[start:end]
+
+    def on_header_value(data: bytes, start: int, end: int):
+        part["value"] += data[start:end]
+
+    def on_header_end():
+        part["headers"][part["field"].lower()] = part["value"]
+        part["field"] = part["value"] = b""
+
+    def on_headers_finished():
+        _, disposition = parse_options_header(part["headers"].get(b"content-disposition"))
+        # Only the first photo part is kept; other fields are skipped
+        part["photo"] = disposition.get(b"name") == PHOTO_FIELD.encode() and not photo["found"]
+        photo["found"] = photo["found"] or part["photo"]
+
+    def on_part_data(data: bytes, start: int, end: int):
+        if part["photo"]:
+            photo["size"] += end - start
+            photo["pending"].append(data[start:end])
+
+    def on_part_end():
+        part["photo"] = False
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+
+    loop = asyncio.get_running_loop()
+    executor = _get_executor()
+    spool = await loop.run_in_executor(executor, _Spool)
+    try:
+        received = 0
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > body_limit:
+                raise _too_large(max_bytes)
+            parser.write(chunk)
+            if photo["size"] > max_bytes:
+                raise _too_large(max_bytes)
+            if photo["pending"]:
+                chunks, photo["pending"] = photo["pending"], []
+                await loop.run_in_executor(executor, spool.write, chunks)
+        parser.finalize()
+        if not photo["found"]:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Missing '{PHOTO_FIELD}' file field"
+            )
+        await loop.run_in_executor(executor, spool.close)
+    except MultipartParseError:
+        await loop.run_in_executor(executor, spool.discard)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Malformed multipart body")
+    except BaseException:
+        await loop.run_in_executor(executor, spool.discard)
+        raise
+    return spool.path, spool.digest.hexdigest()
+
+
+def _store(tmp_path: str, digest: str, sizes: list[int]) -> tuple[str, dict[int, str]]:
+    """Validate the image, move it to its content address and write missing thumbnails."""
+    from PIL import Image, UnidentifiedImageError
+
+    unsupported = HTTPException(
+        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        detail="Photo must be a JPEG, PNG or WebP image"
+    )
+    too_many_pixels = HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Photo must be at most {settings.PHOTO_MAX_PIXELS // 1_000_000} megapixels"
+    )
+    try:
+        try:
+            image = Image.open(tmp_path)
+        except UnidentifiedImageError:
+            raise unsupported
+        except Image.DecompressionBombError:
+            raise too_many_pixels
+        with image:
+            extension = IMAGE_FORMATS.get(image.format)
+            if extension is None:
+                raise unsupported
+            # Checked from the header, before decoding allocates the pixels
+            width, height = image.size
+            if width * height > settings.PHOTO_MAX_PIXELS:
+                raise too_many_pixels
+            try:
+                image.load()
+            except Image.DecompressionBombError:
+                raise too_many_pixels
+            except (OSError, SyntaxError):
+                # Truncated or corrupt image data
+                raise unsupported
+
+            # Identical uploads map to the same files, so existing ones are reused
+            thumbnails = {}
+            for size in sizes:
+                thumbnail = thumbnail_name(digest, size)
+                thumbnail_path = media_path(thumbnail)
+                if not thumbnail_path.exists():
+                    thumbnail_path.parent.mkdir(parents=True, exist_ok=True)
+                    resized = image.convert("RGB")
+                    resized.thumbnail((size, size))
+                    partial = thumbnail_path.with_suffix(".part")
+                    resized.save(partial, "JPEG", quality=85, optimize=True)
+                    os.replace(partial, thumbnail_path)
+                thumbnails[size] = thumbnail
+
+        name = f"{digest}.{extension}"
+        path = media_path(name)
+        if path.exists():
+            os.unlink(tmp_path)
+        else:
+            os.replace(tmp_path, path)
+        return name, thumbnails
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+async def save_photo(request: Request) -> tuple[str, dict[int, str]]:
+    """
+    Store the photo uploaded in a multipart request and its thumbnails.
+
+    Returns the original's file name and {size: thumbnail name}. Writing,
+    decoding and resizing run in the media worker pool.
+    """
+    tmp_path, digest = await receive_photo(request, settings.PHOTO_MAX_BYTES)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), _store, tmp_path, digest, settings.PHOTO_THUMBNAIL_SIZES)
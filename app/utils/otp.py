@@ -1,71 +1,182 @@
+import hmac
+import logging
 import random
 import string
+from abc import ABC, abstractmethod
 from datetime import datetime, timedelta, timezone
-from typing import Optional
-from sqlalchemy.orm import Session
+from functools import lru_cache
+from sqlalchemy import delete, func, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db import AsyncSessionLocal, dialect_insert
 from app.models.models import OTPVerification
+from app.utils.email_queue import send_email
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
 
 def generate_otp() -> str:
     """Generate a random OTP code."""
     return ''.join(random.choices(string.digits, k=settings.OTP_LENGTH))
 
 
-def create_otp(db: Session, email: str, purpose: str) -> tuple[str, datetime]:
-    """Create and store an OTP for email verification."""
-    # Clean up any existing OTPs for this email and purpose
-    db.query(OTPVerification).filter(
-        OTPVerification.email == email,
-        OTPVerification.purpose == purpose
-    ).delete()
-    
-    # Generate new OTP
+class OTPBackend(ABC):
+    """Storage for issued OTP codes; one statement per operation."""
+
+    @abstractmethod
+    async def issue(self, db: AsyncSession, email: str, purpose: str, otp_code: str,
+                    expires_at: datetime, commit: bool = True):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def consume(self, db: AsyncSession, email: str, otp_code: str, purpose: str) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def purge_expired(self) -> int:
+        raise NotImplementedError
+
+
+class DatabaseOTPBackend(OTPBackend):
+    """OTPs in the otp_verifications table, one row per (email, purpose)."""
+
+    async def issue(self, db, email, purpose, otp_code, expires_at, commit=True):
+        # Replaces any previous code for this email and purpose in one upsert
+        stmt = dialect_insert(db, OTPVerification).values(
+            email=email,
+            otp_code=otp_code,
+            purpose=purpose,
+            is_used=False,
+            expires_at=expires_at
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[OTPVerification.email, OTPVerification.purpose],
+            set_={
+                "otp_code": stmt.excluded.otp_code,
+                "is_used": False,
+                "expires_at": stmt.excluded.expires_at,
+                "created_at": func.now(),
+            }
+        )
+        await db.execute(stmt)
+        if commit:
+            await db.commit()
+
+    async def consume(self, db, email, otp_code, purpose):
+        # Check and mark as used in a single conditional UPDATE
+        result = await db.execute(update(OTPVerification).where(
+            OTPVerification.email == email,
+            OTPVerification.otp_code == otp_code,
+            OTPVerification.purpose == purpose,
+            OTPVerification.is_used == False,
+            OTPVerification.expires_at > datetime.now(timezone.utc)
+        ).values(is_used=True))
+        await db.commit()
+        return result.rowcount == 1
+
+    async def purge_expired(self):
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(delete(OTPVerification).where(
+                OTPVerification.expires_at <= datetime.now(timezone.utc)
+            ))
+            await db.commit()
+            return result.rowcount
+
+
+class MemoryOTPBackend(OTPBackend):
+    """Process-local OTP store for single-node deployments; no database round trips."""
+
+    def __init__(self):
+        self._codes: dict[tuple[str, str], tuple[str, datetime]] = {}
+
+    async def issue(self, db, email, purpose, otp_code, expires_at, commit=True):
+        self._codes[(email, purpose)] = (otp_code, expires_at)
+
+    async def consume(self, db, email, otp_code, purpose):
+        entry = self._codes.get((email, purpose))
+        if entry is None:
+            return False
+        code, expires_at = entry
+        if expires_at <= datetime.now(timezone.utc):
+            self._codes.pop((email, purpose), None)
+            return False
+        if not hmac.compare_digest(code, otp_code):
+            return False
+        self._codes.pop((email, purpose), None)
+        return True
+
+    async def purge_expired(self):
+        now = datetime.now(timezone.utc)
+        expired = [key for key, (_, expires_at) in self._codes.items() if expires_at <= now]
+        for key in expired:
+            self._codes.pop(key, None)
+        return len(expired)
+
+
+OTP_BACKENDS = {
+    "database": DatabaseOTPBackend,
+    "memory": MemoryOTPBackend,
+}
+
+
+@lru_cache
+def get_otp_backend() -> OTPBackend:
+    """The OTP backend selected by settings.OTP_BACKEND."""
+    try:
+        return OTP_BACKENDS[settings.OTP_BACKEND]()
+    except KeyError:
+        raise ValueError(f"Unknown OTP_BACKEND {settings.OTP_BACKEND!r}; expected one of {sorted(OTP_BACKENDS)}")
+
+
+async def create_otp(db: AsyncSession, email: str, purpose: str, commit: bool = True) -> tuple[str, datetime]:
+    """
+    Create and store an OTP for email verification.
+
+    Pass commit=False to issue the OTP inside the caller's transaction.
+    """
     otp_code = generate_otp()
     expires_at = datetime.now(timezone.utc) + timedelta(minutes=settings.OTP_EXPIRE_MINUTES)
-    
-    # Store OTP in database
-    otp_record = OTPVerification(
-        email=email,
-        otp_code=otp_code,
-        purpose=purpose,
-        expires_at=expires_at
-    )
-    db.add(otp_record)
-    db.commit()
-    
+    await get_otp_backend().issue(db, email, purpose, otp_code, expires_at, commit=commit)
     return otp_code, expires_at
 
 
-def verify_otp(db: Session, email: str, otp_code: str, purpose: str) -> bool:
-    """Verify an OTP code."""
-    otp_record = db.query(OTPVerification).filter(
-        OTPVerification.email == email,
-        OTPVerification.otp_code == otp_code,
-        OTPVerification.purpose == purpose,
-        OTPVerification.is_used == False,
-        OTPVerification.expires_at > datetime.now(timezone.utc)
-    ).first()
-    
-    if not otp_record:
-        return False
-    
-    # Mark OTP as used
-    db.query(OTPVerification).filter(
-        OTPVerification.id == otp_record.id
-    ).update({"is_used": True})
-    db.commit()
-    
-    return True
+async def verify_otp(db: AsyncSession, email: str, otp_code: str, purpose: str) -> bool:
+    """Verify an OTP code and mark it as used."""
+    return await get_otp_backend().consume(db, email, otp_code, purpose)
+
+
+async def purge_expired_otps():
+    """Remove expired OTPs so the store stays bounded (run by the scheduler)."""
+    try:
+        purged = await get_otp_backend().purge_expired()
+        if purged:
+            logger.info(f"Purged {purged} expired OTPs")
+    except Exception as e:
+        logger.error(f"Error purging expired OTPs: {str(e)}")
 
 
 def send_otp_email(email: str, otp_code: str, purpose: str) -> dict:
-    """Simulate sending OTP via email (for demo purposes)."""
-    # In a real application, you would integrate with an email service
-    # For this demo, we'll just return a success message
+    """
+    Queue the OTP email for background delivery.
+
+    Returns as soon as the message is enqueued; without SMTP_HOST the code is
+    only logged (for demo purposes).
+    """
+    subject = f"Your {settings.PROJECT_NAME} verification code"
+    body = (
+        f"Your one-time code for {purpose} is {otp_code}.\n"
+        f"It expires in {settings.OTP_EXPIRE_MINUTES} minutes."
+    )
+    queued = send_email(email, subject, body)
+    if not queued:
+        if settings.SMTP_HOST:
+            # Delivery is configured, so the code must not end up in the logs
+            logger.warning(f"OTP for {email} ({purpose}) could not be queued for delivery")
+        else:
+            logger.info(f"OTP for {email} ({purpose}) not emailed: {otp_code}")
     return {
-        "success": True,
+        "success": queued,
         "message": f"OTP {otp_code} sent to {email} for {purpose}",
         "email": email,
         "otp_code": otp_code  # Remove this in production!
-    }
\ No newline at end of file
+    }
@@ -0,0 +1,80 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Optional
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+from app.config import settings
+
+
+@lru_cache
+def get_password_context() -> CryptContext:
+    """
+    Password hashing policy.
+
+    min and max rounds are pinned to the configured cost so that hashes made
+    with any other cost are reported as needing an update on next login.
+    """
+    rounds = settings.BCRYPT_ROUNDS
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+
+@lru_cache
+def _get_executor() -> ThreadPoolExecutor:
+    # bcrypt releases the GIL, so threads give real parallelism here
+    return ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+
+
+@lru_cache
+def _get_slots() -> asyncio.Semaphore:
+    # Bounds hashing work that is running or waiting for a worker
+    return asyncio.Semaphore(settings.PASSWORD_HASH_MAX_PENDING)
+
+
+async def _run_in_pool(func, *args):
+    """Run password work off the event loop, rejecting callers when the pool is saturated."""
+    slots = _get_slots()
+    try:
+        await asyncio.wait_for(slots.acquire(), timeout=settings.PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_executor(), func, *args)
+    finally:
+        slots.release()
+
+
+def _verify_and_update(plain_password: str, hashed_password: Optional[str]) -> tuple[bool, Optional[str]]:
+    if not hashed_password:
+        return False, None
+    try:
+        return get_password_context().verify_and_update(plain_password, hashed_password)
+    except ValueError:
+        # Not a password hash (e.g. accounts created through Google sign-in)
+        return False, None
+
+
+async def hash_password(password: str) -> str:
+    """Hash a password in the worker pool."""
+    return await _run_in_pool(get_password_context().hash, password)
+
+
+async def verify_and_update_password(plain_password: str, hashed_password: Optional[str]) -> tuple[bool, Optional[str]]:
+    """
+    Verify a password in the worker pool.
+
+    Returns (valid, new_hash); new_hash is set when the stored hash uses an
+    outdated cost and should be replaced.
+    """
+    return await _run_in_pool(_verify_and_update, plain_password, hashed_password)
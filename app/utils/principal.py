@@ -0,0 +1,40 @@
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Optional
+from app.config import settings
+from app.models.models import Doctor, VerificationStatus
+from app.utils.cache import TTLCache
+
+
+@dataclass(frozen=True)
+class DoctorPrincipal:
+    """Snapshot of the authenticated doctor used by get_current_doctor."""
+    id: int
+    email: str
+    full_name: str
+    is_verified: Optional[VerificationStatus]
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+    @classmethod
+    def from_doctor(cls, doctor: Doctor) -> "DoctorPrincipal":
+        return cls(
+            id=doctor.id,
+            email=doctor.email,
+            full_name=doctor.full_name,
+            is_verified=doctor.is_verified,
+            created_at=doctor.created_at,
+            updated_at=doctor.updated_at,
+        )
+
+
+@lru_cache
+def get_principal_cache() -> TTLCache:
+    """Per-process cache of principals keyed by doctor id."""
+    return TTLCache(maxsize=settings.PRINCIPAL_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS)
+
+
+def invalidate_principal(doctor_id: int):
+    """Drop a cached principal after the doctor row is written."""
+    get_principal_cache().pop(doctor_id)
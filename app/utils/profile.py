@@ -1,102 +1,105 @@
-from typing import Optional
-from app.models.models import Doctor
+from typing import Any, Mapping
+from app.models.models import Doctor, PROFILE_FIELD_COUNT
+
+# Optional fields that contribute to profile completeness, with the tip shown
+# while each is missing. Bit i of Doctor.profile_tips_mask is set while field i
+# is missing, so the order must never change; append new fields at the end.
+PROFILE_FIELDS = [
+    ('phone_number', "Add your phone number for WhatsApp contact"),
+    ('clinic_name', "Add your clinic name to help patients find you"),
+    ('clinic_address', "Add your clinic address for better visibility"),
+    ('speciality_id', "Select your medical speciality"),
+    ('sub_speciality_id', "Choose your sub-speciality for more specific expertise"),
+    ('years_of_experience', "Add your years of experience to build trust"),
+    ('qualification', "Add your professional qualifications and degrees"),
+    ('medical_institute', "Mention your medical institute/university"),
+    ('awards', "Add any awards or recognitions you've received"),
+    ('medical_council_regd_no', "Add your medical council registration number"),
+    ('profile_photo', "Upload a professional profile photo"),
+    ('professional_bio', "Write a professional bio to introduce yourself"),
+]
+assert len(PROFILE_FIELDS) == PROFILE_FIELD_COUNT
+
+PROFILE_FIELD_BITS = {name: 1 << bit for bit, (name, _) in enumerate(PROFILE_FIELDS)}
+ALL_FIELDS_MISSING = (1 << len(PROFILE_FIELDS)) - 1
+
+NUMERIC_FIELDS = {'speciality_id', 'sub_speciality_id', 'years_of_experience'}
+
+
+def is_field_filled(name: str, value: Any) -> bool:
+    # Numeric fields count when positive, string fields when not blank
+    if name in NUMERIC_FIELDS:
+        return value is not None and value > 0
+    return value is not None and bool(str(value).strip())
+
+
+def missing_fields_mask(values: Mapping[str, Any]) -> int:
+    """Bitmask of the profile fields that are missing from values."""
+    mask = 0
+    for name, bit in PROFILE_FIELD_BITS.items():
+        if not is_field_filled(name, values.get(name)):
+            mask |= bit
+    return mask
+
+
+def completeness_from_mask(mask: int) -> int:
+    # Same integer arithmetic as the Doctor.profile_completeness column
+    filled_fields = len(PROFILE_FIELDS) - bin(mask).count("1")
+    return filled_fields * 100 // len(PROFILE_FIELDS)
+
+
+def tips_from_mask(mask: int) -> list[str]:
+    return [tip for bit, (_, tip) in enumerate(PROFILE_FIELDS) if mask & (1 << bit)]
+
+
+def missing_fields_from_mask(mask: int) -> list[str]:
+    return [name for bit, (name, _) in enumerate(PROFILE_FIELDS) if mask & (1 << bit)]
+
+
+def tips_mask_update(changes: Mapping[str, Any]):
+    """
+    SQL expression for Doctor.profile_tips_mask after applying changes.
+
+    Only the bits of the changed fields are touched, so the new mask is
+    derived from the stored one without reading the row first. A NULL mask
+    (row not backfilled yet) stays NULL.
+    """
+    changed = 0
+    missing = 0
+    for name, value in changes.items():
+        bit = PROFILE_FIELD_BITS.get(name)
+        if bit is None:
+            continue
+        changed |= bit
+        if not is_field_filled(name, value):
+            missing |= bit
+    if not changed:
+        return Doctor.profile_tips_mask
+    keep = ALL_FIELDS_MISSING & ~changed
+    return Doctor.profile_tips_mask.bitwise_and(keep).bitwise_or(missing)
+
+
+def _doctor_mask(doctor: Doctor) -> int:
+    if doctor.profile_tips_mask is not None:
+        return doctor.profile_tips_mask
+    return missing_fields_mask({name: getattr(doctor, name, None) for name, _ in PROFILE_FIELDS})
 
 
 def calculate_profile_completeness(doctor: Doctor) -> int:
     """
-    Calculate the profile completeness percentage based on filled optional fields.
-    Required fields (full_name, email, hashed_password) are not counted as they're always present.
+    Profile completeness percentage based on filled optional fields.
+
+    Read from the stored column when present; required fields (full_name,
+    email, hashed_password) are not counted as they're always present.
     """
-    # Define the optional fields that contribute to profile completeness
-    optional_fields = [
-        'phone_number',
-        'clinic_name',
-        'clinic_address', 
-        'speciality_id',
-        'sub_speciality_id',
-        'years_of_experience',
-        'qualification',
-        'medical_institute',
-        'awards',
-        'medical_council_regd_no',
-        'profile_photo',
-        'professional_bio'
-    ]
-    
-    filled_fields = 0
-    total_fields = len(optional_fields)
-    
-    for field in optional_fields:
-        value = getattr(doctor, field, None)
-        
-        # Handle different field types appropriately
-        if field in ['speciality_id', 'sub_speciality_id', 'years_of_experience']:
-            # For numeric fields, consider filled if not None and > 0
-            if value is not None and value > 0:
-                filled_fields += 1
-        else:
-            # For string fields, consider filled if not None and not empty string
-            if value is not None and str(value).strip():
-                filled_fields += 1
-    
-    # Calculate percentage
-    completeness_percentage = int((filled_fields / total_fields) * 100) if total_fields > 0 else 100
-    
-    return completeness_percentage
+    if doctor.profile_completeness is not None:
+        return doctor.profile_completeness
+    return completeness_from_mask(_doctor_mask(doctor))
 
 
 def get_profile_completeness_tips(doctor: Doctor) -> list[str]:
     """
     Get tips for improving profile completeness based on missing fields.
     """
-    tips = []
-    
-    phone_number = getattr(doctor, 'phone_number', None)
-    if not phone_number or not str(phone_number).strip():
-        tips.append("Add your phone number for WhatsApp contact")
-    
-    clinic_name = getattr(doctor, 'clinic_name', None)
-    if not clinic_name or not str(clinic_name).strip():
-        tips.append("Add your clinic name to help patients find you")
-    
-    clinic_address = getattr(doctor, 'clinic_address', None)
-    if not clinic_address or not str(clinic_address).strip():
-        tips.append("Add your clinic address for better visibility")
-    
-    speciality_id = getattr(doctor, 'speciality_id', None)
-    if speciality_id is None or speciality_id <= 0:
-        tips.append("Select your medical speciality")
-    
-    sub_speciality_id = getattr(doctor, 'sub_speciality_id', None)
-    if sub_speciality_id is None or sub_speciality_id <= 0:
-        tips.append("Choose your sub-speciality for more specific expertise")
-    
-    years_of_experience = getattr(doctor, 'years_of_experience', None)
-    if years_of_experience is None or years_of_experience <= 0:
-        tips.append("Add your years of experience to build trust")
-    
-    qualification = getattr(doctor, 'qualification', None)
-    if not qualification or not str(qualification).strip():
-        tips.append("Add your professional qualifications and degrees")
-    
-    medical_institute = getattr(doctor, 'medical_institute', None)
-    if not medical_institute or not str(medical_institute).strip():
-        tips.append("Mention your medical institute/university")
-    
-    awards = getattr(doctor, 'awards', None)
-    if not awards or not str(awards).strip():
-        tips.append("Add any awards or recognitions you've received")
-    
-    medical_council_regd_no = getattr(doctor, 'medical_council_regd_no', None)
-    if not medical_council_regd_no or not str(medical_council_regd_no).strip():
-        tips.append("Add your medical council registration number")
-    
-    profile_photo = getattr(doctor, 'profile_photo', None)
-    if not profile_photo or not str(profile_photo).strip():
-        tips.append("Upload a professional profile photo")
-    
-    professional_bio = getattr(doctor, 'professional_bio', None)
-    if not professional_bio or not str(professional_bio).strip():
-        tips.append("Write a professional bio to introduce yourself")
-    
-    return tips
\ No newline at end of file
+    return tips_from_mask(_doctor_mask(doctor))
+
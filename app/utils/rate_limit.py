@@ -0,0 +1,125 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional
+from fastapi import HTTPException, Request, status
+from app.config import settings
+
+
+def _window_position(window: int) -> tuple[int, float]:
+    now = time.time()
+    index = int(now // window)
+    return index, (now - index * window) / window
+
+
+def _estimate(previous: int, current: int, progress: float) -> float:
+    # Sliding-window approximation: the previous window's count fades out linearly
+    return previous * (1 - progress) + current
+
+
+class MemoryRateLimitBackend:
+    """
+    Per-process sliding-window counters.
+
+    Each key keeps two integers (current and previous fixed window), so every
+    decision is O(1); least recently used keys are evicted beyond max_keys.
+    """
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._counters: OrderedDict[str, list[int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def hit(self, key: str, limit: int, window: int) -> Optional[float]:
+        """Count a request; return seconds to wait if it is over the limit, else None."""
+        index, progress = _window_position(window)
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is None:
+                counter = [index, 0, 0]
+                self._counters[key] = counter
+                if len(self._counters) > self.max_keys:
+                    self._counters.popitem(last=False)
+            else:
+                self._counters.move_to_end(key)
+
+            counter_index, current, previous = counter
+            if counter_index != index:
+                previous = current if counter_index == index - 1 else 0
+                current = 0
+
+            if _estimate(previous, current, progress) >= limit:
+                counter[:] = [index, current, previous]
+                return window * (1 - progress)
+
+            counter[:] = [index, current + 1, previous]
+            return None
+
+
+class RedisRateLimitBackend:
+    """Sliding-window counters shared by all workers through Redis."""
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("RATE_LIMIT_REDIS_URL is set but the 'redis' package is not installed")
+        self._redis = redis.from_url(url)
+
+    async def hit(self, key: str, limit: int, window: int) -> Optional[float]:
+        index, progress = _window_position(window)
+        current_key = f"ratelimit:{key}:{index}"
+        previous_key = f"ratelimit:{key}:{index - 1}"
+
+        previous, current = await self._redis.mget(previous_key, current_key)
+        if _estimate(int(previous or 0), int(current or 0), progress) >= limit:
+            return window * (1 - progress)
+
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.incr(current_key)
+            pipe.expire(current_key, window * 2)
+            await pipe.execute()
+        return None
+
+
+@lru_cache
+def get_rate_limiter():
+    """Shared Redis limiter when configured, otherwise per-process counters."""
+    if settings.RATE_LIMIT_REDIS_URL:
+        return RedisRateLimitBackend(settings.RATE_LIMIT_REDIS_URL)
+    return MemoryRateLimitBackend(settings.RATE_LIMIT_MAX_KEYS)
+
+
+def get_client_ip(request: Request) -> str:
+    if settings.RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+async def enforce_rate_limit(request: Request, scope: str, email: Optional[str] = None):
+    """
+    Reject the request with 429 when the client IP or email is over its limit.
+
+    Call this first in a handler, before any hashing or database work.
+    """
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+
+    limiter = get_rate_limiter()
+    window = settings.RATE_LIMIT_WINDOW_SECONDS
+    checks = [(f"{scope}:ip:{get_client_ip(request)}", settings.RATE_LIMIT_PER_IP)]
+    if email:
+        checks.append((f"{scope}:email:{email.lower()}", settings.RATE_LIMIT_PER_EMAIL))
+
+    for key, limit in checks:
+        retry_after = await limiter.hit(key, limit, window)
+        if retry_after is not None:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many attempts. Please try again later.",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
@@ -0,0 +1,109 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Optional
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db import AsyncSessionLocal
+from app.models.revoked_token import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+
+class RevocationFilter:
+    """
+    In-memory set of revoked refresh-token ids.
+
+    Each id is kept only until its token would have expired anyway, so the
+    set stays bounded by the number of revocations in one token lifetime.
+    """
+
+    def __init__(self):
+        self._expires: dict[str, float] = {}
+        self._synced_at: Optional[datetime] = None
+        self._lock = threading.Lock()
+
+    def __contains__(self, jti: str) -> bool:
+        return jti in self._expires
+
+    def __len__(self) -> int:
+        return len(self._expires)
+
+    def add(self, jti: str, expires_at: float):
+        with self._lock:
+            self._expires[jti] = expires_at
+
+    def prune(self):
+        now = time.time()
+        with self._lock:
+            self._expires = {jti: exp for jti, exp in self._expires.items() if exp > now}
+
+    async def sync(self, db: AsyncSession):
+        """Pull revocations made by other workers since the last sync."""
+        started = datetime.now(timezone.utc)
+        query = select(RevokedToken.jti, RevokedToken.expires_at).where(RevokedToken.expires_at > started)
+        if self._synced_at is not None:
+            # Overlap the previous window so rows committed late are not missed
+            query = query.where(RevokedToken.revoked_at >= self._synced_at - timedelta(minutes=1))
+        for jti, expires_at in await db.execute(query):
+            if expires_at.tzinfo is None:
+                expires_at = expires_at.replace(tzinfo=timezone.utc)
+            self.add(jti, expires_at.timestamp())
+        self._synced_at = started
+        self.prune()
+
+    def stats(self) -> dict:
+        return {"size": len(self._expires), "synced_at": self._synced_at.isoformat() if self._synced_at else None}
+
+
+@lru_cache
+def get_revocation_filter() -> RevocationFilter:
+    return RevocationFilter()
+
+
+async def revoke_refresh_token(db: AsyncSession, jti: str, doctor_id: Optional[int], expires_at: float) -> bool:
+    """
+    Record a refresh token as used.
+
+    Returns False if it was already revoked, i.e. the token is being replayed.
+    """
+    try:
+        await db.execute(insert(RevokedToken).values(
+            jti=jti,
+            doctor_id=doctor_id,
+            expires_at=datetime.fromtimestamp(expires_at, timezone.utc),
+            revoked_at=datetime.now(timezone.utc)
+        ))
+        await db.commit()
+        revoked = True
+    except IntegrityError:
+        await db.rollback()
+        revoked = False
+    get_revocation_filter().add(jti, expires_at)
+    return revoked
+
+
+async def sync_revoked_tokens():
+    """Refresh the in-memory revocation filter from the database (run by the scheduler)."""
+    try:
+        async with AsyncSessionLocal() as db:
+            await get_revocation_filter().sync(db)
+    except Exception as e:
+        logger.error(f"Error syncing revoked tokens: {str(e)}")
+
+
+async def purge_expired_revocations():
+    """Delete revocation rows whose tokens have expired (run by the scheduler)."""
+    try:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(delete(RevokedToken).where(
+                RevokedToken.expires_at <= datetime.now(timezone.utc)
+            ))
+            await db.commit()
+            if result.rowcount:
+                logger.info(f"Purged {result.rowcount} expired token revocations")
+    except Exception as e:
+        logger.error(f"Error purging token revocations: {str(e)}")
@@ -1,8 +1,10 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
-from sqlalchemy.orm import Session
-from datetime import datetime, timezone
-from app.db import SessionLocal
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timedelta, timezone
+from app.config import settings
+from app.db import AsyncSessionLocal
 from app.models.post import Post, PostStatus
 from app.utils.publishers.facebook_publisher import FacebookPublisher
 from app.utils.publishers.instagram_publisher import InstagramPublisher
@@ -11,6 +13,10 @@ from app.utils.publishers.twitter_publisher import TwitterPublisher
 from app.utils.publishers.youtube_publisher import YouTubePublisher
 from app.utils.publishers.reddit_publisher import RedditPublisher
 from app.utils.publishers.quora_publisher import QuoraPublisher
+from app.utils.master_cache import sync_master_cache
+from app.utils.otp import purge_expired_otps
+from app.utils.revocation import purge_expired_revocations, sync_revoked_tokens
+from app.utils.smoothing import build_window, plan_dispatch
 import logging
 
 logger = logging.getLogger(__name__)
@@ -32,24 +38,41 @@ scheduler = AsyncIOScheduler()
 
 async def check_due_posts():
     """Check for posts that are due to be published"""
-    db: Session = SessionLocal()
-    try:
-        # Get all scheduled posts that are due
-        due_posts = db.query(Post).filter(
-            Post.status == PostStatus.SCHEDULED,
-            Post.scheduled_at <= datetime.now(timezone.utc)
-        ).all()
-        
-        for post in due_posts:
-            await publish_post(post, db)
+    async with AsyncSessionLocal() as db:
+        try:
+            now = datetime.now(timezone.utc)
+            slot_seconds = settings.SCHEDULER_SLOT_SECONDS
+
+            # Look far enough ahead to see every post whose tolerance window
+            # overlaps the windows that are already open
+            horizon = now + timedelta(minutes=2 * settings.SCHEDULER_MAX_TOLERANCE_MINUTES)
+            pending_posts = (await db.scalars(select(Post).where(
+                Post.status == PostStatus.SCHEDULED,
+                Post.scheduled_at <= horizon
+            ))).all()
+
+            plan = plan_dispatch(
+                build_window(post.id, post.scheduled_at, post.tolerance_minutes, now, slot_seconds)
+                for post in pending_posts
+            )
+            due_ids = plan.due_now()
+
+            if plan.flexible_posts:
+                logger.info(
+                    f"Dispatch smoothing: peak {plan.unsmoothed_peak} -> {plan.smoothed_peak} posts/slot "
+                    f"({plan.peak_reduction:.0%} reduction) across {len(pending_posts)} pending posts, "
+                    f"{plan.flexible_posts} flexible"
+                )
+
+            for post in pending_posts:
+                if post.id in due_ids:
+                    await publish_post(post, db)
             
-    except Exception as e:
-        logger.error(f"Error checking due posts: {str(e)}")
-    finally:
-        db.close()
+        except Exception as e:
+            logger.error(f"Error checking due posts: {str(e)}")
 
 
-async def publish_post(post: Post, db: Session):
+async def publish_post(post: Post, db: AsyncSession):
     """Publish a single post using the appropriate publisher"""
     try:
         publisher = PUBLISHERS.get(post.platform)
@@ -75,16 +98,16 @@ async def publish_post(post: Post, db: Session):
         logger.error(f"Failed to publish post {post.id} on {post.platform}: {str(e)}")
     
     finally:
-        db.commit()
+        await db.commit()
 
 
 def start_scheduler():
     """Start the post scheduler"""
     if not scheduler.running:
-        # Add job to check for due posts every minute
+        # Add job to check for due posts once per dispatch slot
         scheduler.add_job(
             check_due_posts,
-            trigger=IntervalTrigger(minutes=1),
+            trigger=IntervalTrigger(seconds=settings.SCHEDULER_SLOT_SECONDS),
             id="check_due_posts",
             name="Check for due posts",
             replace_existing=True,
@@ -92,6 +115,46 @@ def start_scheduler():
             coalesce=True  # Combine multiple missed jobs into one
         )
         
+        # Expired OTPs are never read again; sweep them so the store stays bounded
+        scheduler.add_job(
+            purge_expired_otps,
+            trigger=IntervalTrigger(minutes=settings.OTP_SWEEP_INTERVAL_MINUTES),
+            id="purge_expired_otps",
+            name="Purge expired OTPs",
+            replace_existing=True,
+            coalesce=True
+        )
+        
+        # Keep this worker's refresh-token revocation filter in step with the others
+        scheduler.add_job(
+            sync_revoked_tokens,
+            trigger=IntervalTrigger(seconds=settings.REVOCATION_SYNC_SECONDS),
+            id="sync_revoked_tokens",
+            name="Sync revoked refresh tokens",
+            replace_existing=True,
+            next_run_time=datetime.now(),
+            coalesce=True
+        )
+        
+        # Pick up master data written by other workers
+        scheduler.add_job(
+            sync_master_cache,
+            trigger=IntervalTrigger(seconds=settings.MASTER_CACHE_POLL_SECONDS),
+            id="sync_master_cache",
+            name="Check master data version",
+            replace_existing=True,
+            coalesce=True
+        )
+        
+        scheduler.add_job(
+            purge_expired_revocations,
+            trigger=IntervalTrigger(minutes=settings.REVOCATION_PURGE_MINUTES),
+            id="purge_expired_revocations",
+            name="Purge expired token revocations",
+            replace_existing=True,
+            coalesce=True
+        )
+        
         scheduler.start()
         logger.info("Post scheduler started")
 
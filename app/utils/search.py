@@ -0,0 +1,112 @@
+import difflib
+import re
+from typing import Optional
+from sqlalchemy import Float, and_, bindparam, case, cast, func, literal, literal_column, or_, select, table
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.models import Doctor
+from app.models.search import SEARCH_DOCUMENT_SQL
+from app.utils.master_cache import MasterSnapshot
+
+# Added to the text score of doctors whose speciality or sub-speciality name matches
+SPECIALITY_MATCH_BOOST = 0.5
+MAX_QUERY_TERMS = 8
+
+
+def tokenize(query: str) -> list[str]:
+    return re.findall(r"\w+", query.casefold())[:MAX_QUERY_TERMS]
+
+
+def matching_ids(names: dict[int, str], terms: list[str]) -> list[int]:
+    """Ids whose name contains a word starting with, or close to, one of the terms."""
+    ids = []
+    for id, name in names.items():
+        words = re.findall(r"\w+", name.casefold())
+        for term in terms:
+            if any(word.startswith(term) for word in words) or difflib.get_close_matches(term, words, n=1, cutoff=0.8):
+                ids.append(id)
+                break
+    return ids
+
+
+def _postgres_text_match(terms: list[str], raw_query: str):
+    """Full-text prefix match plus trigram word similarity for typos, both index-backed."""
+    document = literal_column(f"({SEARCH_DOCUMENT_SQL})")
+    vector = literal_column(f"to_tsvector('simple', {SEARCH_DOCUMENT_SQL})")
+    tsquery = func.to_tsquery(literal_column("'simple'"), bindparam("tsquery", " | ".join(f"{term}:*" for term in terms)))
+    text = bindparam("search_text", raw_query)
+    match = or_(vector.op("@@")(tsquery), text.op("<%")(document))
+    rank = func.greatest(func.ts_rank(vector, tsquery), func.word_similarity(text, document))
+    return match, rank, None
+
+
+def _sqlite_text_match(terms: list[str], raw_query: str):
+    """FTS5 prefix match ranked by bm25 (lower is better, so negated)."""
+    fts = table("doctors_fts")
+    condition = literal_column("doctors_fts").op("MATCH")(" OR ".join(f'"{term}"*' for term in terms))
+    matches = (
+        select(literal_column("rowid").label("doctor_id"), (-func.bm25(literal_column("doctors_fts"))).label("rank"))
+        .select_from(fts)
+        .where(condition)
+        .subquery()
+    )
+    # An IN over the FTS rowids, rather than testing the outer join, lets SQLite
+    # answer the OR with the speciality indexes by index lookups (MULTI-INDEX OR)
+    match = Doctor.id.in_(select(literal_column("rowid")).select_from(fts).where(condition))
+    return match, func.coalesce(matches.c.rank, 0), matches
+
+
+async def search_doctors(
+    db: AsyncSession,
+    query: str,
+    master: MasterSnapshot,
+    filters: list,
+    after: Optional[list],
+    limit: int
+) -> list:
+    """
+    Relevance-ranked doctor search; returns up to limit + 1 rows ordered by (score desc, id).
+
+    after is the (score, id) of the last row of the previous page.
+    """
+    terms = tokenize(query)
+    if not terms:
+        return []
+
+    if db.get_bind().dialect.name == "postgresql":
+        text_match, text_rank, fts = _postgres_text_match(terms, query)
+    else:
+        text_match, text_rank, fts = _sqlite_text_match(terms, query)
+
+    conditions = [text_match]
+    boost = literal(0.0)
+    speciality_ids = matching_ids(master.specialities, terms)
+    sub_speciality_ids = matching_ids({id: name for id, (_, name) in master.sub_specialities.items()}, terms)
+    if speciality_ids or sub_speciality_ids:
+        speciality_match = or_(
+            Doctor.speciality_id.in_(speciality_ids),
+            Doctor.sub_speciality_id.in_(sub_speciality_ids)
+        )
+        conditions.append(speciality_match)
+        boost = case((speciality_match, SPECIALITY_MATCH_BOOST), else_=0.0)
+
+    ranked = select(
+        Doctor.id,
+        Doctor.full_name,
+        Doctor.clinic_name,
+        Doctor.qualification,
+        Doctor.medical_institute,
+        Doctor.speciality_id,
+        Doctor.sub_speciality_id,
+        Doctor.profile_photo,
+        Doctor.is_verified,
+        cast(text_rank + boost, Float).label("score"),
+    )
+    if fts is not None:
+        ranked = ranked.outerjoin(fts, fts.c.doctor_id == Doctor.id)
+    ranked = ranked.where(or_(*conditions), *filters).subquery()
+
+    page = select(ranked).order_by(ranked.c.score.desc(), ranked.c.id).limit(limit + 1)
+    if after is not None:
+        score, id = after
+        page = page.where(or_(ranked.c.score < score, and_(ranked.c.score == score, ranked.c.id > id)))
+    return (await db.execute(page)).all()
@@ -0,0 +1,103 @@
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from math import ceil, floor
+from typing import Iterable, Optional
+
+
+@dataclass
+class DispatchWindow:
+    """A post's allowed dispatch range expressed in scheduler slots."""
+    post_id: int
+    nominal_slot: int
+    start_slot: int
+    end_slot: int
+
+
+@dataclass
+class DispatchPlan:
+    """Slot assignment for pending posts plus the peak load it achieves."""
+    slots: dict[int, int] = field(default_factory=dict)
+    unsmoothed_peak: int = 0
+    smoothed_peak: int = 0
+    flexible_posts: int = 0
+
+    @property
+    def peak_reduction(self) -> float:
+        """Fraction by which the busiest slot shrank compared to exact-time dispatch."""
+        if self.unsmoothed_peak == 0:
+            return 0.0
+        return 1 - self.smoothed_peak / self.unsmoothed_peak
+
+    def due_now(self) -> set[int]:
+        """Post ids assigned to the current slot."""
+        return {post_id for post_id, slot in self.slots.items() if slot == 0}
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Treat naive datetimes (e.g. from SQLite) as UTC."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def build_window(
+    post_id: int,
+    scheduled_at: datetime,
+    tolerance_minutes: Optional[int],
+    now: datetime,
+    slot_seconds: int,
+) -> DispatchWindow:
+    """
+    Map a post's scheduled time and tolerance onto slot indices relative to now.
+
+    Slot 0 is the current scheduler tick; slot k is the tick k * slot_seconds later.
+    Without a tolerance the post keeps today's behaviour: it goes out on the first
+    tick at or after its scheduled time.
+    """
+    offset = (_as_utc(scheduled_at) - now).total_seconds()
+    slack = (tolerance_minutes or 0) * 60
+
+    nominal = max(0, ceil(offset / slot_seconds))
+    if not slack:
+        return DispatchWindow(post_id, nominal, nominal, nominal)
+
+    start = max(0, ceil((offset - slack) / slot_seconds))
+    end = max(start, floor((offset + slack) / slot_seconds))
+    return DispatchWindow(post_id, nominal, start, end)
+
+
+def _peak(loads: dict[int, int]) -> int:
+    return max(loads.values(), default=0)
+
+
+def plan_dispatch(windows: Iterable[DispatchWindow]) -> DispatchPlan:
+    """
+    Spread posts across their tolerance windows to flatten the busiest slot.
+
+    Posts are placed earliest-deadline-first into the least loaded slot of their
+    window (ties go to the earliest slot), so fixed-time posts are accounted for
+    before flexible ones fill the gaps around them.
+    """
+    windows = sorted(windows, key=lambda w: (w.end_slot, w.start_slot, w.post_id))
+    plan = DispatchPlan()
+
+    nominal_loads: dict[int, int] = {}
+    loads: dict[int, int] = {}
+    for window in windows:
+        nominal_loads[window.nominal_slot] = nominal_loads.get(window.nominal_slot, 0) + 1
+
+        if window.start_slot == window.end_slot:
+            slot = window.start_slot
+        else:
+            plan.flexible_posts += 1
+            slot = min(
+                range(window.start_slot, window.end_slot + 1),
+                key=lambda candidate: (loads.get(candidate, 0), candidate),
+            )
+
+        loads[slot] = loads.get(slot, 0) + 1
+        plan.slots[window.post_id] = slot
+
+    plan.unsmoothed_peak = _peak(nominal_loads)
+    plan.smoothed_peak = _peak(loads)
+    return plan
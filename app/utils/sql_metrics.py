@@ -0,0 +1,96 @@
+import logging
+import random
+import time
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+
+class RequestQueryStats:
+    """Queries and database time accumulated while serving one request."""
+
+    __slots__ = ("count", "duration", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements: dict[str, int] = {}
+
+    def record(self, statement: str, elapsed: float):
+        self.count += 1
+        self.duration += elapsed
+        self.statements[statement] = self.statements.get(statement, 0) + 1
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Statements executed more than threshold times (likely N+1 patterns)."""
+        return [(sql, n) for sql, n in self.statements.items() if n > threshold]
+
+
+# Only set for sampled requests, so unsampled queries pay a single lookup
+_current_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar("sql_request_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is None:
+        return
+    starts = conn.info.get("query_start")
+    if starts:
+        stats.record(statement, time.perf_counter() - starts.pop())
+
+
+def instrument_engine(engine: Engine):
+    """Attach the per-request query counters to a (sync) engine."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class SQLMetricsMiddleware:
+    """
+    Count queries and DB time for a sample of requests and report them via Server-Timing.
+
+    Plain ASGI rather than BaseHTTPMiddleware, so unsampled requests pass
+    straight through. The header carries the queries run before the response
+    started; the N+1 check also covers queries made while streaming the body.
+    """
+
+    def __init__(self, app: ASGIApp, sample_rate: float, repeat_threshold: int):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.repeat_threshold = repeat_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or random.random() >= self.sample_rate:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats()
+
+        async def send_with_timing(message: Message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", f'db;dur={stats.duration * 1000:.2f};desc="{stats.count} queries"')
+            await send(message)
+
+        token = _current_stats.set(stats)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_stats.reset(token)
+
+        for statement, times in stats.repeated(self.repeat_threshold):
+            logger.warning(
+                f"Possible N+1 on {scope['method']} {scope['path']}: statement ran {times} times: "
+                f"{' '.join(statement.split())[:200]}"
+            )
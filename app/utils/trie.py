@@ -0,0 +1,78 @@
+import bisect
+import re
+import unicodedata
+from typing import Hashable
+
+# Longest indexed prefix; typing past it still returns the matches found so far
+MAX_PREFIX_LENGTH = 48
+
+
+def fold(text: str) -> str:
+    """Lower-case, strip diacritics and collapse whitespace, so "Cardiología" matches "cardiologia"."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.casefold().split())
+
+
+class _Node:
+    __slots__ = ("children", "top")
+
+    def __init__(self):
+        self.children: dict[str, "_Node"] = {}
+        self.top: list[tuple[tuple, Hashable]] = []  # Best (rank, key) pairs below this node, best first
+
+
+class PrefixTrie:
+    """
+    Typeahead index over short names.
+
+    Every word of a name is indexed as a prefix, so "card" finds "Interventional
+    Cardiology". Each node keeps the best max_results keys of its subtree,
+    making a lookup one step per typed character. Names whose first word
+    matches rank before later-word matches, then shorter names first.
+    Entries can only be added; rebuild the trie to remove or rename one.
+    """
+
+    def __init__(self, max_results: int = 10):
+        self.max_results = max_results
+        self._root = _Node()
+        self._keys: set[Hashable] = set()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._keys
+
+    def insert(self, key: Hashable, text: str):
+        folded = fold(text)
+        self._keys.add(key)
+        for position, word in enumerate(re.finditer(r"\w+", folded)):
+            rank = (position > 0, len(folded), folded)
+            node = self._root
+            for char in folded[word.start():word.start() + MAX_PREFIX_LENGTH]:
+                node = node.children.setdefault(char, _Node())
+                self._offer(node, rank, key)
+
+    def _offer(self, node: _Node, rank: tuple, key: Hashable):
+        for index, (existing_rank, existing_key) in enumerate(node.top):
+            if existing_key == key:
+                # Same name reached through another of its words
+                if existing_rank <= rank:
+                    return
+                del node.top[index]
+                break
+        bisect.insort(node.top, (rank, key))
+        del node.top[self.max_results:]
+
+    def search(self, prefix: str, limit: int) -> list[Hashable]:
+        """Best keys whose name has a word starting with prefix."""
+        folded = fold(prefix)[:MAX_PREFIX_LENGTH]
+        if not folded:
+            return []
+        node = self._root
+        for char in folded:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return [key for _, key in node.top[:limit]]